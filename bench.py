@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+import pandas as pd
+
+import csv_cleaner
+import dns_cache
+import extractor
+from fakes import FakeCSEServer, FakeSiteServer, ZoneFileResolver
+from scraper_log import setup_logging
+
+# --- CONFIGURATION ---
+BASELINE_FILE = "bench_baseline.json"   # Reference rates per row count, re-recorded with --update-baseline
+TOLERANCE     = 0.30                    # Fail if throughput drops more than this below baseline
+DEFAULT_ROWS  = 10_000                  # Synthetic pages / CSV rows (10k–100k)
+TEST_ROWS     = 2_000                   # Row count used by test_bench.py (pytest)
+AGENCY_RATIO  = 100                     # Full-agency runs use rows // AGENCY_RATIO agencies
+SEED          = 1234
+REPEAT        = 3                       # Best of this many runs per benchmark, to damp noise
+# ------------------------
+
+WORDS = ("villa", "sea", "golf", "puerto", "banus", "nueva", "andalucia", "sierra", "blanca", "luxury")
+
+
+def agency_host(i):
+    # Real public suffix so domain matching behaves as for live sites; DNS
+    # and HTTP for these hosts are served by the fakes
+    return f"agency{i}-marbella.es"
+
+
+def synthetic_page(rng, i, n_links=40):
+    """
+    Homepage-sized HTML with navigation, listings, a few junk addresses and
+    (for most agencies) a real one in one of the forms the extractor handles.
+    """
+    host = agency_host(i)
+    links = [f'<a href="/{rng.choice(WORDS)}-{k}">{rng.choice(WORDS).title()} {k}</a>' for k in range(n_links)]
+    links.append('<a href="/contacto" title="Contact us">Contacto</a>')
+    links.append(f'<a href="https://other{i}.test/x">partner</a>')
+    listing = " ".join(rng.choice(WORDS) for _ in range(400))
+    contact = rng.choice((
+        f'<a href="mailto:info@{host}">info@{host}</a>',
+        f"ventas [at] {host.replace('.', ' [dot] ')}",
+        f"<p>sales&#64;{host}</p>",
+        "",
+    ))
+    return (
+        f"<html><head><script>var cfg={{dsn:'abc@sentry.io'}};</script></head><body>"
+        f"<nav>{''.join(links)}</nav><main>{listing}</main>"
+        f"<img src='banner-home-02@2x.jpg'><footer>{contact}</footer></body></html>"
+    )
+
+
+def timed(label, count, func, setup=None, repeat=REPEAT):
+    """
+    Best rate (items/s) over `repeat` runs of `func`; `setup` runs untimed
+    before each one to reset state such as the DNS cache.
+    """
+    elapsed = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - started)
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{label:<22} {count:>8} items  {elapsed:8.2f}s  {rate:12.1f} items/s")
+    return rate
+
+
+def bench_extract_emails(pages, hosts):
+    def run():
+        for html, host in zip(pages, hosts):
+            extractor.extract_emails(html, f"http://{host}/", host.split(".")[0])
+    return timed("extract_emails", len(pages), run)
+
+
+def bench_get_internal_links(pages, hosts):
+    def run():
+        for html, host in zip(pages, hosts):
+            extractor.get_internal_links(html, f"http://{host}/")
+    return timed("get_internal_links", len(pages), run)
+
+
+def bench_csv_cleaner(rng, rows, workdir):
+    """
+    csv_cleaner.main over a synthetic export mixing agency addresses, junk
+    and domains without MX, with MX answers from a zone file.
+    """
+    emails = []
+    zone = ["$TTL 3600"]
+    for i in range(rows):
+        host = agency_host(i % (rows // 10 or 1))
+        emails.append(rng.choice((
+            f"info@{host}", f"ventas@{host}", "123@abc.com",
+            f"banner-{i}@2x.jpg", f"x{i}@sentry.wixpress.com", f"user{i}@nomx{i % 50}.es",
+        )))
+    for i in range(rows // 10 or 1):
+        zone.append(f"{agency_host(i)}. MX 10 mail.{agency_host(i)}.")
+    resolver = ZoneFileResolver(text="\n".join(zone))
+
+    path = os.path.join(workdir, "emails.csv")
+    pd.DataFrame({"agency": ["x"] * rows, "email": emails}).to_csv(path, index=False)
+    csv_cleaner.INPUT_FILES = [path]
+    csv_cleaner.OUTPUT_FILE = os.path.join(workdir, "unique.csv")
+    # Every run starts with a cold DNS cache, like a fresh cleaner run
+    return timed("csv_cleaner.main", rows, csv_cleaner.main, setup=lambda: dns_cache.set_backend(resolver))
+
+
+def bench_full_agency(rng, count):
+    """
+    CSE lookup + steps A/B for `count` agencies against the fake CSE, fake
+    sites and zone-file DNS. Every site resolves at A or B so no render runs.
+    """
+    pages, results, zone = {}, {}, ["$TTL 3600"]
+    for i in range(count):
+        host = f"www.{agency_host(i)}"
+        home = synthetic_page(rng, i)
+        site_pages = {"/": home}
+        if agency_host(i) not in home.replace(" [dot] ", "."):
+            site_pages["/contacto"] = f'<p><a href="mailto:hola@{host}">hola@{host}</a></p>'
+        pages[host] = site_pages
+        zone.append(f"{host}. A 127.0.0.1")
+    resolver = ZoneFileResolver(text="\n".join(zone))
+    dns_cache.install()
+
+    with FakeSiteServer(pages) as sites, FakeCSEServer(results) as cse:
+        for i in range(count):
+            results[f"Agency {i}"] = [sites.site_url(f"www.{agency_host(i)}")]
+        extractor.CSE_URL = cse.url
+
+        def run():
+            for i in range(count):
+                name = f"Agency {i}"
+                extractor.scrape_agency(name, extractor.search_agency_site(name))
+        return timed("full agency (A/B)", count, run, setup=lambda: dns_cache.set_backend(resolver))
+
+
+def load_baseline(rows):
+    """
+    Reference rates recorded for `rows` ({} if none). Rates depend on the
+    row count (e.g. DNS-cache hit ratio in csv_cleaner), so each row count
+    has its own entry.
+    """
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        return json.load(f).get(str(rows), {})
+
+
+def save_baseline(rows, rates):
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            baselines = json.load(f)
+    baselines[str(rows)] = rates
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+
+
+def run_benchmarks(rows):
+    """
+    Run every benchmark over `rows` synthetic pages / CSV rows and return
+    {name: items per second}.
+    """
+    rng = random.Random(SEED)
+    hosts = [agency_host(i) for i in range(rows)]
+    pages = [synthetic_page(rng, i) for i in range(rows)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        return {
+            "extract_emails": bench_extract_emails(pages, hosts),
+            "get_internal_links": bench_get_internal_links(pages, hosts),
+            "csv_cleaner": bench_csv_cleaner(rng, rows, workdir),
+            "full_agency": bench_full_agency(rng, max(1, rows // AGENCY_RATIO)),
+        }
+
+
+def find_regressions(rates, baseline):
+    """
+    Descriptions of every rate more than TOLERANCE below its baseline.
+    """
+    return [
+        f"{name}: {rate:.1f} items/s vs baseline {baseline[name]:.1f}"
+        for name, rate in rates.items()
+        if name in baseline and rate < baseline[name] * (1 - TOLERANCE)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks with regression check.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="synthetic pages / CSV rows")
+    parser.add_argument("--update-baseline", action="store_true", help=f"write results to {BASELINE_FILE}")
+    parser.add_argument("--ci", action="store_true", default=bool(os.environ.get("CI")),
+                        help=f"fail when {BASELINE_FILE} has no entry for --rows (default when $CI is set)")
+    args = parser.parse_args()
+
+    setup_logging(level=logging.WARNING, json_path="")
+    rates = run_benchmarks(args.rows)
+
+    if args.update_baseline:
+        save_baseline(args.rows, rates)
+        print(f"Baseline for {args.rows} rows written to {BASELINE_FILE}")
+        return 0
+
+    baseline = load_baseline(args.rows)
+    if not baseline:
+        print(f"No {BASELINE_FILE} entry for {args.rows} rows; record one with --update-baseline")
+        return 1 if args.ci else 0
+    failed = find_regressions(rates, baseline)
+    if failed:
+        print("REGRESSION:\n  " + "\n  ".join(failed))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import re
+import json
+import unicodedata
+from collections import deque
+from urllib.parse import urljoin, urlparse
+
+# --- CONFIGURATION ---
+# Keyword -> weight, grouped by language. Higher weight = more likely to be
+# the page holding the agency's email. Override with load_keywords(path).
+CONTACT_KEYWORDS = {
+    "en": {"contact": 10, "contacts": 10, "contact-us": 10, "get-in-touch": 8, "enquiry": 6,
+           "about": 4, "about-us": 5, "aboutus": 5, "our-team": 4, "team": 3, "office": 3,
+           "legal-notice": 3, "imprint": 4},
+    "es": {"contacto": 10, "contactar": 10, "contactenos": 10, "contactanos": 10, "contacta": 9,
+           "quienes-somos": 5, "quienessomos": 5, "sobre-nosotros": 5, "sobrenosotros": 5, "nosotros": 4,
+           "aviso-legal": 4, "oficina": 3, "equipo": 3},
+    "it": {"contatto": 10, "contatti": 10, "chi-siamo": 5, "chisiamo": 5},
+    "pt": {"contato": 10, "contactos": 10, "sobre-nos": 5},
+    "fr": {"contacter": 10, "contactez": 10, "nous-contacter": 10,
+           "a-propos": 4, "qui-sommes-nous": 5, "mentions-legales": 4},
+    "de": {"kontakt": 10, "impressum": 7, "ueber-uns": 5, "uber-uns": 5, "ueberuns": 5},
+    "nl": {"contacteer": 10, "over-ons": 5},
+    "nordic": {"kontakt-oss": 10, "kontakta": 10, "kontakta-oss": 10,
+               "om-oss": 5, "om-os": 5, "yhteystiedot": 10, "ota-yhteytta": 10},
+    "ru": {"контакты": 10, "о-нас": 5},
+}
+# Stems that also match as a token prefix, for run-together slugs such as
+# "/contactus", "/ContactUs.aspx", "/contactenos-ya" or "/kontaktformular"
+CONTACT_STEMS = {"contact": 10, "kontakt": 10, "contat": 10, "контакт": 10}
+
+# Multiplier per link field; link text is the strongest signal
+FIELD_WEIGHTS = {"text": 1.5, "href": 1.0, "title": 1.0}
+# Keywords weighing less than this ("about", "team", "office") only count
+# when they are a whole path segment or the whole link text, so listing
+# slugs like "/property/about-town-villa" are not contact pages
+WHOLE_SEGMENT_BELOW = 5
+# ------------------------
+
+# Raw-HTML anchor scanner so scoring does not need a full DOM parse
+ANCHOR_RX = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+ATTR_RX   = re.compile(r'\b(href|title)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+TAG_RX    = re.compile(r"<[^>]+>")
+SEP_RX    = re.compile(r"[\s_/.]+")
+SEGMENT_RX = re.compile(r"[/?&=]+")
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over a {keyword: weight} dictionary. One pass over
+    a string returns every keyword occurring in it, however many there are.
+    Keywords only match whole `boundary`-separated tokens, so "team" does not
+    hit "steam" nor "office" hit "offices".
+    """
+
+    def __init__(self, keywords, boundary="-"):
+        self.boundary = boundary
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for word, weight in keywords.items():
+            self._add(word.lower(), weight)
+        self._build()
+
+    def _add(self, word, weight):
+        node = 0
+        for ch in word:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((word, weight))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """
+        Yield (start, end, keyword, weight) for every keyword occurring in
+        `text` on token boundaries.
+        """
+        node = 0
+        goto, fail, out, sep = self.goto, self.fail, self.out, self.boundary
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node] or (i + 1 < len(text) and text[i + 1] != sep):
+                continue
+            for word, weight in out[node]:
+                start = i + 1 - len(word)
+                if start == 0 or text[start - 1] == sep:
+                    yield start, i + 1, word, weight
+
+    def find(self, text):
+        """
+        Return the set of (keyword, weight) pairs occurring in `text`.
+        """
+        return {(word, weight) for _, _, word, weight in self.iter_matches(text)}
+
+
+def flatten_keywords(by_language):
+    """
+    Merge the per-language dictionaries, keeping the highest weight per keyword.
+    """
+    merged = {}
+    for words in by_language.values():
+        for word, weight in words.items():
+            merged[word] = max(weight, merged.get(word, 0))
+    return merged
+
+
+def load_keywords(path):
+    """
+    Load a {language: {keyword: weight}} JSON file and return a new matcher.
+    """
+    with open(path, encoding="utf-8") as f:
+        return KeywordMatcher(flatten_keywords(json.load(f)))
+
+
+_default_matcher = KeywordMatcher(flatten_keywords(CONTACT_KEYWORDS))
+
+
+def _normalize(text):
+    # "Contact Us", "contact_us" and "/contact-us/" should all hit "contact-us";
+    # accents are dropped so "Quiénes somos" hits "quienes-somos"
+    text = unicodedata.normalize("NFKD", text.strip().lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return SEP_RX.sub("-", text)
+
+
+def _score_segments(matcher, segments):
+    # Overlapping hits ("contact" inside "contact-us") count once, at the best weight
+    best = 0
+    for segment in segments:
+        segment = _normalize(segment).strip("-")
+        for start, end, _, weight in matcher.iter_matches(segment):
+            if weight < WHOLE_SEGMENT_BELOW and (start, end) != (0, len(segment)):
+                continue
+            best = max(best, weight)
+        for token in segment.split(matcher.boundary):
+            for stem, weight in CONTACT_STEMS.items():
+                if weight > best and token.startswith(stem):
+                    best = weight
+    return best
+
+
+def score_link(href="", text="", title="", matcher=None):
+    """
+    Weighted contact-likeness of a link from its href (path + query), text
+    and title. Returns 0 for links that match no keyword.
+    """
+    matcher = matcher or _default_matcher
+    return (
+        FIELD_WEIGHTS["href"] * _score_segments(matcher, SEGMENT_RX.split(href))
+        + FIELD_WEIGHTS["text"] * _score_segments(matcher, [TAG_RX.sub(" ", text)])
+        + FIELD_WEIGHTS["title"] * _score_segments(matcher, [title])
+    )
+
+
+def _host(netloc):
+    host = netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def scan_contact_links(html, base_url="", matcher=None):
+    """
+    Score every <a> in raw `html` in a single pass. Links to other hosts than
+    `base_url` are skipped; only path + query of the href is scored.
+    Returns [(score, href), ...] for matching links, best first, hrefs unique.
+    """
+    base_host = _host(urlparse(base_url).netloc)
+    best = {}
+    for attrs, text in ANCHOR_RX.findall(html):
+        fields = {}
+        for name, v1, v2 in ATTR_RX.findall(attrs):
+            fields[name.lower()] = v1 or v2
+        href = fields.get("href", "").strip()
+        if not href or href.startswith(("mailto:", "tel:", "javascript:", "#")):
+            continue
+        parsed = urlparse(urljoin(base_url, href))
+        if parsed.netloc and base_host and _host(parsed.netloc) != base_host:
+            continue
+        score = score_link(f"{parsed.path}?{parsed.query}", text, fields.get("title", ""), matcher)
+        if score > best.get(href, 0):
+            best[href] = score
+    return sorted(((s, h) for h, s in best.items()), key=lambda p: (-p[0], p[1]))
+
+
+def rank_urls(urls, matcher=None):
+    """
+    Split `urls` into (contact_links, other_links); contact links are ordered
+    by descending score so the most promising page is fetched first.
+    """
+    # Score path + query only, so a domain like "contactproperties.com" does
+    # not turn every internal link into a contact link
+    scored = []
+    for u in urls:
+        parsed = urlparse(u)
+        scored.append((score_link(href=f"{parsed.path}?{parsed.query}", matcher=matcher), u))
+    contact = [u for s, u in sorted(scored, key=lambda p: (-p[0], p[1])) if s > 0]
+    other = sorted(u for s, u in scored if s <= 0)
+    return contact, other
@@ -1,8 +1,11 @@
 import re
 import pandas as pd
-import dns.resolver
 import tldextract
 
+import dns_cache
+from email_rank import is_junk_email
+from scraper_log import get_logger, setup_logging
+
 # --- CONFIGURATION ---
 INPUT_FILES = [
     "out_combined.csv",
@@ -24,60 +27,66 @@ MEDIA_EXT_RX = re.compile(
     re.IGNORECASE
 )
 
-# 3) Regex to detect any “wixpress” emails
-WIXPRESS_RX = re.compile(r'wixpress', re.IGNORECASE)
-ABC_123_RX = re.compile(r'123@abc.com')
+# 3) Wixpress, placeholders (123@abc.com) and other third-party addresses
+#    are caught by email_rank.is_junk_email before any MX lookup
+
+log = get_logger("cleaner")
+page_log = get_logger("page")
+
+# Bundled public-suffix snapshot: no list download on first use
+_tld_extract = tldextract.TLDExtract(suffix_list_urls=())
 
 # Helpers
 
 def has_valid_tld(email: str) -> bool:
-    ext = tldextract.extract(email)
+    ext = _tld_extract(email)
     valid = bool(ext.suffix)
-    print(f"    [DEBUG] TLD check for '{email}', suffix='{ext.suffix}', valid={valid}")
+    page_log.debug("TLD check for '%s', suffix='%s', valid=%s", email, ext.suffix, valid)
     return valid
 
 
 def has_mx_record(domain: str) -> bool:
+    # Shared cache: each domain is looked up once per run, NXDOMAIN included
     try:
-        dns.resolver.resolve(domain, 'MX')
-        print(f"    [DEBUG] MX record found for domain '{domain}'")
+        dns_cache.resolve(domain, 'MX')
+        page_log.debug("MX record found for domain '%s'", domain)
         return True
     except Exception as e:
-        print(f"    [DEBUG] No MX record for domain '{domain}': {e}")
+        page_log.debug("No MX record for domain '%s': %s", domain, e)
         return False
 
 
 def is_valid(email: str) -> bool:
-    print(f"[DEBUG] Validating email '{email}'...")
+    page_log.debug("Validating email '%s'...", email)
     if not EMAIL_RX.match(email):
-        print("    [DEBUG] Failed EMAIL_RX")
+        page_log.debug("Failed EMAIL_RX")
         return False
     if MEDIA_EXT_RX.match(email):
-        print("    [DEBUG] Matches MEDIA_EXT_RX, skipping")
+        page_log.debug("Matches MEDIA_EXT_RX, skipping")
         return False
-    if WIXPRESS_RX.search(email):
-        print("    [DEBUG] Contains 'wixpress', skipping")
+    if is_junk_email(email):
+        page_log.debug("Known junk domain or placeholder, skipping")
         return False
     if not has_valid_tld(email):
         return False
     domain = email.split('@', 1)[1]
     if not has_mx_record(domain):
         return False
-    print(f"    [DEBUG] Email '{email}' passed all checks")
+    page_log.debug("Email '%s' passed all checks", email)
     return True
 
 
 def extract_emails_from_df(df: pd.DataFrame, path: str) -> list:
-    print(f"[DEBUG] Extracting emails from '{path}'")
+    log.debug("Extracting emails from '%s'", path)
     cols = [c for c in df.columns if 'email' in c.lower()]
     if not cols and df.shape[1] >= 2:
         cols = [df.columns[1]]
     all_emails = []
     for col in cols:
         s = df[col].dropna().astype(str).str.strip().str.lower()
-        print(f"    [DEBUG] Column '{col}' has {len(s)} entries")
+        log.debug("Column '%s' has %s entries", col, len(s))
         all_emails.extend(s.tolist())
-    print(f"    [DEBUG] Extracted total {len(all_emails)} raw emails from '{path}'")
+    log.debug("Extracted total %s raw emails from '%s'", len(all_emails), path)
     return all_emails
 
 
@@ -85,12 +94,12 @@ def main():
     all_emails = []
 
     for path in INPUT_FILES:
-        print(f"\n[INFO] Processing file: {path}")
+        log.info("Processing file: %s", path)
         try:
             df = pd.read_csv(path, encoding="utf-8", dtype=str)
-            print(f"    [DEBUG] Read {len(df)} rows from '{path}'")
+            log.debug("Read %s rows from '%s'", len(df), path)
         except Exception as e:
-            print(f"[WARN] Skipping '{path}' due to read error: {e}")
+            log.warning("Skipping '%s' due to read error: %s", path, e)
             continue
 
         extracted = extract_emails_from_df(df, path)
@@ -98,17 +107,18 @@ def main():
         for e in extracted:
             if is_valid(e):
                 filtered.append(e)
-        print(f"    [DEBUG] After validation: kept {len(filtered)} of {len(extracted)} emails")
+        log.debug("After validation: kept %s of %s emails", len(filtered), len(extracted))
         all_emails.extend(filtered)
 
     unique_emails = sorted(set(all_emails))
-    print(f"\n[INFO] Total collected emails: {len(all_emails)}")
-    print(f"[INFO] Unique emails after dedupe: {len(unique_emails)}")
+    log.info("Total collected emails: %s", len(all_emails))
+    log.info("Unique emails after dedupe: %s", len(unique_emails))
 
     pd.DataFrame({'email': unique_emails}).to_csv(
         OUTPUT_FILE, index=False, encoding="utf-8"
     )
-    print(f"\n[INFO] Saved {len(unique_emails)} unique emails to '{OUTPUT_FILE}'")
+    log.info("Saved %s unique emails to '%s'", len(unique_emails), OUTPUT_FILE)
 
 if __name__ == "__main__":
+    setup_logging()
     main()
@@ -0,0 +1,109 @@
+import re
+import html as html_lib
+from urllib.parse import unquote
+
+# Regexes for the obfuscated address forms we can recover without a browser
+
+# Cloudflare email protection: <span data-cfemail="..."> and
+# <a href="/cdn-cgi/l/email-protection#...">
+CFEMAIL_RX     = re.compile(r'data-cfemail=[\'"]([0-9a-fA-F]+)[\'"]')
+CF_HREF_RX     = re.compile(r'/cdn-cgi/l/email-protection#([0-9a-fA-F]+)')
+
+# info [at] domain [dot] com, info(at)domain(dot)com, info {arroba} domain.es
+# Quantifiers are bounded (RFC 5321 local part / DNS label lengths) so long
+# runs of word characters, e.g. base64 blobs, cannot make the scan quadratic.
+# A bare "." only separates labels without surrounding whitespace, so prose
+# like "photos [at] night. Come" is not read as an address.
+AT_TOKEN_RX    = re.compile(r"[\[\(\{]\s*(?:at|arroba|chez)\s*[\]\)\}]", re.IGNORECASE)
+DOT_WORD       = r"\s*[\[\(\{]\s*(?:dot|punto|point)\s*[\]\)\}]\s*"
+AT_WORD_RX     = re.compile(
+    r"([A-Za-z0-9._%+-]{1,64})\s*[\[\(\{]\s*(?:at|arroba|chez)\s*[\]\)\}]\s*"
+    r"([A-Za-z0-9-]{1,63}(?:(?:\.|" + DOT_WORD + r")[A-Za-z0-9-]{1,63})+)",
+    re.IGNORECASE
+)
+DOT_WORD_RX    = re.compile(DOT_WORD, re.IGNORECASE)
+
+# JS-assembled addresses: 'info' + '@' + 'domain.com' and String.fromCharCode(105,110,...)
+JS_CONCAT_RX   = re.compile(r"""(?:"[^"\n]*"|'[^'\n]*')(?:\s*\+\s*(?:"[^"\n]*"|'[^'\n]*'))+""")
+JS_LITERAL_RX  = re.compile(r""""([^"\n]*)"|'([^'\n]*)'""")
+FROMCHARCODE_RX = re.compile(r"String\.fromCharCode\(\s*([0-9,\s]+)\)")
+
+EMAIL_RX       = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+
+def decode_cfemail(encoded):
+    """
+    Decode a Cloudflare `data-cfemail` hex string. The first byte is the XOR
+    key for the rest. Returns the decoded string, or "" if it is malformed.
+    """
+    try:
+        key = int(encoded[:2], 16)
+        return "".join(
+            chr(int(encoded[i:i + 2], 16) ^ key)
+            for i in range(2, len(encoded) - 1, 2)
+        )
+    except ValueError:
+        return ""
+
+
+def _decode_cloudflare(html):
+    found = set()
+    for encoded in CFEMAIL_RX.findall(html) + CF_HREF_RX.findall(html):
+        found |= set(EMAIL_RX.findall(decode_cfemail(encoded)))
+    return found
+
+
+def _decode_entities(html):
+    # Only worth a second scan if entities or %-escapes could hide an "@"
+    found = set()
+    if "&" in html:
+        unescaped = html_lib.unescape(html)
+        if unescaped != html:
+            found |= set(EMAIL_RX.findall(unescaped))
+    if "%40" in html:
+        found |= set(EMAIL_RX.findall(unquote(html)))
+    return found
+
+
+def _decode_at_words(html):
+    # Cheap token check first; almost no page spells out "[at]"
+    found = set()
+    if not AT_TOKEN_RX.search(html):
+        return found
+    for local, domain in AT_WORD_RX.findall(html):
+        domain = DOT_WORD_RX.sub(".", domain)
+        candidate = f"{local}@{domain}"
+        if EMAIL_RX.fullmatch(candidate):
+            found.add(candidate)
+    return found
+
+
+def _decode_js(html):
+    found = set()
+    if "+" in html:
+        for expr in JS_CONCAT_RX.findall(html):
+            joined = "".join(a or b for a, b in JS_LITERAL_RX.findall(expr))
+            if "@" in joined:
+                found |= set(EMAIL_RX.findall(joined))
+    for codes in FROMCHARCODE_RX.findall(html):
+        try:
+            text = "".join(chr(int(c)) for c in codes.split(",") if c.strip())
+        except ValueError:
+            continue
+        found |= set(EMAIL_RX.findall(text))
+    return found
+
+
+def deobfuscate_emails(html):
+    """
+    Recover addresses hidden by Cloudflare email protection, HTML entities,
+    "[at]"/"[dot]" spellings and JS string assembly in raw `html`.
+    Returns a set of emails; literal addresses are left to EMAIL_RX/MAILTO_RX.
+    """
+    found = set()
+    if "cfemail" in html or "email-protection" in html:
+        found |= _decode_cloudflare(html)
+    found |= _decode_entities(html)
+    found |= _decode_at_words(html)
+    found |= _decode_js(html)
+    return found
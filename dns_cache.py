@@ -0,0 +1,323 @@
+import os
+import time
+import errno
+import socket
+import asyncio
+import selectors
+import threading
+import ipaddress
+
+import dns.resolver
+import dns.asyncresolver
+import dns.exception
+
+# --- CONFIGURATION ---
+DNS_TIMEOUT          = 2.0    # Per-lookup budget; dead domains fail after this at most
+MIN_TTL              = 60     # Floor for positive answers (seconds)
+MAX_TTL              = 3600   # Cap for positive answers (seconds)
+NEGATIVE_TTL         = 900    # How long NXDOMAIN / no-answer results are remembered
+HAPPY_EYEBALLS_DELAY = 0.25   # Head start for each address before racing the next
+PREFETCH_CONCURRENCY = 20     # Max lookups in flight during one prefetch
+PREFETCH_BATCH       = 10     # prefetch_ahead() warms this many upcoming hosts at a time
+DNS_ZONE_FILE        = os.environ.get("DNS_ZONE_FILE", "")  # Answer from this zone file instead (offline runs)
+# ------------------------
+
+# (name, rdtype) -> (expires_at, records or None, exception or None)
+_cache = {}
+_lock = threading.Lock()
+
+_resolver = dns.resolver.Resolver()
+_resolver.lifetime = DNS_TIMEOUT
+
+# None = live DNS through dnspython; otherwise a callable
+# backend(name, rdtype) -> (records, ttl), e.g. fakes.ZoneFileResolver
+_backend = None
+
+# Answers that are definitive and safe to cache negatively
+_NEGATIVE = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+
+def _ttl(ttl):
+    return max(MIN_TTL, min(MAX_TTL, ttl))
+
+
+def _records(answer, rdtype):
+    if rdtype == "MX":
+        return sorted((r.preference, r.exchange.to_text()) for r in answer)
+    return [r.to_text() for r in answer]
+
+
+def set_backend(backend):
+    """
+    Answer lookups from `backend(name, rdtype) -> (records, ttl)` instead of
+    live DNS (None restores live DNS). The backend raises
+    dns.resolver.NXDOMAIN / NoAnswer like dnspython does. Clears the cache.
+    """
+    global _backend
+    _backend = backend
+    with _lock:
+        _cache.clear()
+
+
+def _lookup(name, rdtype):
+    if _backend is not None:
+        return _backend(name, rdtype)
+    answer = _resolver.resolve(name, rdtype)
+    return _records(answer, rdtype), answer.rrset.ttl
+
+
+def _cached(key):
+    with _lock:
+        entry = _cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        with _lock:
+            _cache.pop(key, None)
+        return None
+    return entry
+
+
+def _store(key, ttl, records=None, error=None):
+    with _lock:
+        _cache[key] = (time.monotonic() + ttl, records, error)
+
+
+def resolve(name, rdtype="A"):
+    """
+    Resolve `name`/`rdtype` through the process-wide cache.
+    Returns a list of records (MX as (preference, exchange) pairs).
+    Raises the original dnspython error for NXDOMAIN / no answer, from the
+    negative cache when we have seen it recently.
+    """
+    key = (name.lower().rstrip("."), rdtype)
+    entry = _cached(key)
+    if entry is not None:
+        if entry[2] is not None:
+            raise entry[2]
+        return entry[1]
+    try:
+        records, ttl = _lookup(key[0], rdtype)
+    except _NEGATIVE as e:
+        _store(key, NEGATIVE_TTL, error=e)
+        raise
+    _store(key, _ttl(ttl), records=records)
+    return records
+
+
+async def _prefetch_one(resolver, name, rdtype):
+    key = (name.lower().rstrip("."), rdtype)
+    if _cached(key) is not None:
+        return
+    try:
+        answer = await resolver.resolve(key[0], rdtype)
+    except _NEGATIVE as e:
+        _store(key, NEGATIVE_TTL, error=e)
+    except dns.exception.DNSException:
+        pass  # timeouts are not cached; the real lookup will retry
+    else:
+        _store(key, _ttl(answer.rrset.ttl), records=_records(answer, rdtype))
+
+
+async def _prefetch_all(names, rdtypes):
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = DNS_TIMEOUT
+    # Bounded so a long list does not burst the resolver into dropping queries
+    limit = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    async def bounded(name, rdtype):
+        async with limit:
+            await _prefetch_one(resolver, name, rdtype)
+
+    await asyncio.gather(*(bounded(name, rdtype) for name in names for rdtype in rdtypes))
+
+
+def _prefetch_sync(name, rdtype):
+    try:
+        resolve(name, rdtype)
+    except dns.exception.DNSException:
+        pass
+
+
+def prefetch(names, rdtypes=("A", "AAAA")):
+    """
+    Warm the cache for `names` concurrently in a background thread.
+    Returns the thread so callers can join() it if they want to wait.
+    """
+    names = sorted({n for n in names if n and not _is_ip(n)})
+    if _backend is not None:
+        target = lambda: [_prefetch_sync(n, t) for n in names for t in rdtypes]
+    else:
+        target = lambda: asyncio.run(_prefetch_all(names, rdtypes))
+    thread = threading.Thread(target=target, name="dns-prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+def prefetch_ahead(items, host_of, batch=PREFETCH_BATCH):
+    """
+    Yield `items` in order, prefetching the hosts (`host_of(item)`, may be
+    None) of each next `batch` as the loop reaches it, so cached answers
+    are still fresh when a slow, paced loop gets to them.
+    """
+    items = list(items)
+    for start in range(0, len(items), batch):
+        chunk = items[start:start + batch]
+        prefetch(host_of(item) for item in chunk)
+        yield from chunk
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+def host_resolves(host):
+    """
+    False only when `host` definitively has no A/AAAA records (NXDOMAIN,
+    no answer). Timeouts return True so the HTTP layer still gets a try.
+    """
+    if not host or _is_ip(host) or host == "localhost":
+        return bool(host)
+    negative = 0
+    for rdtype in ("A", "AAAA"):
+        try:
+            if resolve(host, rdtype):
+                return True
+        except _NEGATIVE:
+            negative += 1
+        except dns.exception.DNSException:
+            return True
+    return negative < 2
+
+
+def getaddrinfo(host, port, family=0, type=socket.SOCK_STREAM, proto=0, flags=0):
+    """
+    Drop-in for socket.getaddrinfo backed by the cache. Falls back to the
+    system resolver on timeouts, and raises socket.gaierror on NXDOMAIN.
+    """
+    host = host.strip("[]") if isinstance(host, str) else host
+    if not host or _is_ip(host) or host == "localhost":
+        return socket.getaddrinfo(host, port, family, type, proto, flags)
+
+    wanted = []
+    if family in (0, socket.AF_INET6):
+        wanted.append((socket.AF_INET6, "AAAA"))
+    if family in (0, socket.AF_INET):
+        wanted.append((socket.AF_INET, "A"))
+
+    infos, negative = [], 0
+    for af, rdtype in wanted:
+        try:
+            for addr in resolve(host, rdtype):
+                sa = (addr, port, 0, 0) if af == socket.AF_INET6 else (addr, port)
+                infos.append((af, type or socket.SOCK_STREAM, proto, "", sa))
+        except _NEGATIVE:
+            negative += 1
+        except dns.exception.DNSException:
+            return socket.getaddrinfo(host, port, family, type, proto, flags)
+    if not infos:
+        if negative == len(wanted):
+            raise socket.gaierror(socket.EAI_NONAME, f"Name or service not known: {host}")
+        return socket.getaddrinfo(host, port, family, type, proto, flags)
+    return infos
+
+
+def _interleave(infos):
+    # RFC 8305: alternate address families, IPv6 first
+    v6 = [i for i in infos if i[0] == socket.AF_INET6]
+    v4 = [i for i in infos if i[0] != socket.AF_INET6]
+    out = []
+    for pair in zip(v6, v4):
+        out.extend(pair)
+    longer = v6 if len(v6) > len(v4) else v4
+    out.extend(longer[min(len(v6), len(v4)):])
+    return out
+
+
+def create_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+                      source_address=None, socket_options=None):
+    """
+    Happy-eyeballs replacement for urllib3.util.connection.create_connection:
+    resolves through the cache and races staggered connects across addresses,
+    keeping the first socket that connects.
+    """
+    host, port = address
+    if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+        timeout = socket.getdefaulttimeout()
+    infos = _interleave(getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    sel = selectors.DefaultSelector()
+    pending = {}
+    errors = []
+    winner = None
+    idx = 0
+    try:
+        while winner is None:
+            if idx < len(infos):
+                af, socktype, proto, _, sa = infos[idx]
+                idx += 1
+                sock = socket.socket(af, socktype, proto)
+                try:
+                    for opt in socket_options or ():
+                        sock.setsockopt(*opt)
+                    if source_address:
+                        sock.bind(source_address)
+                    sock.setblocking(False)
+                    err = sock.connect_ex(sa)
+                    if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                        raise OSError(err, os.strerror(err))
+                    sel.register(sock, selectors.EVENT_WRITE)
+                    pending[sock] = sa
+                except OSError as e:
+                    errors.append(e)
+                    sock.close()
+                    continue
+            elif not pending:
+                break
+
+            wait = HAPPY_EYEBALLS_DELAY if idx < len(infos) else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait = remaining if wait is None else min(wait, remaining)
+            for key, _ in sel.select(wait):
+                sock = key.fileobj
+                sel.unregister(sock)
+                pending.pop(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0:
+                    winner = sock
+                    break
+                errors.append(OSError(err, os.strerror(err)))
+                sock.close()
+    finally:
+        for sock in pending:
+            sock.close()
+        sel.close()
+
+    if winner is None:
+        if errors:
+            raise errors[-1]
+        raise socket.timeout(f"connect to {host}:{port} timed out")
+    winner.settimeout(timeout)
+    return winner
+
+
+def install():
+    """
+    Route every requests/urllib3 connection in this process through the
+    cache and happy-eyeballs connect. Safe to call more than once.
+    """
+    import urllib3.util.connection as u3_connection
+    u3_connection.create_connection = create_connection
+
+
+if DNS_ZONE_FILE:
+    from fakes import ZoneFileResolver
+    set_backend(ZoneFileResolver(DNS_ZONE_FILE))
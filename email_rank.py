@@ -0,0 +1,187 @@
+import re
+import bisect
+import functools
+import unicodedata
+
+import tldextract
+
+# --- CONFIGURATION ---
+TOP_N     = 5       # Keep at most this many emails per page
+
+# Domains that never belong to an agency: site builders, trackers, web-agency
+# credits and placeholders copied from templates
+JUNK_DOMAINS = frozenset({
+    "wixpress.com", "sentry.io", "sentry-next.wixpress.com", "sentry.wixpress.com",
+    "example.com", "example.org", "example.net", "example.es", "domain.com",
+    "email.com", "yourdomain.com", "yoursite.com", "mysite.com", "company.com",
+    "abc.com", "test.com", "sample.com", "website.com",
+    "godaddy.com", "wordpress.com", "wordpress.org", "squarespace.com",
+    "w3.org", "schema.org", "googlegroups.com", "cloudflare.com",
+    "inmovilla.com", "witei.com", "resales-online.com", "kyero.com",
+    "idealista.com", "fotocasa.es", "properstar.com", "aplaceinthesun.com",
+})
+# Free mail providers: legitimate for small agencies, but no domain evidence
+PROVIDER_DOMAINS = frozenset({
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.es", "hotmail.co.uk",
+    "outlook.com", "outlook.es", "live.com", "msn.com", "yahoo.com", "yahoo.es",
+    "yahoo.co.uk", "icloud.com", "me.com", "aol.com", "gmx.com", "gmx.de",
+    "web.de", "protonmail.com", "telefonica.net", "btinternet.com", "mail.ru",
+    "yandex.ru", "mail.com",
+})
+# Agency-name words that say nothing about the domain
+NAME_STOPWORDS = frozenset({
+    "real", "estate", "marbella", "inmobiliaria", "inmobiliarias", "properties",
+    "property", "homes", "home", "group", "spain", "costa", "del", "sol", "the",
+    "and", "agency", "realty", "inmo", "international", "internacional", "los",
+    "las", "gestiones", "servicios", "agencia", "villas", "estates", "orihuela",
+})
+# ------------------------
+
+# Generic local parts like "email@", "name@" or "user@" are real addresses at
+# a real domain; as template placeholders they sit at a JUNK_DOMAINS domain
+JUNK_LOCAL_RX = re.compile(
+    r"^(?:example|test|your-?(?:e-?mail|name)|john\.?doe|"
+    r"no-?reply|do-?not-?reply|[0-9]+)$",
+    re.IGNORECASE
+)
+MEDIA_EXT_RX  = re.compile(r"\.(?:png|jpe?g|gif|svg|webp|mp4|mp3|css|js)$", re.IGNORECASE)
+TOKEN_RX      = re.compile(r"[a-z0-9]+")
+# Page scans for page_features(), run on the lowercased HTML. Addresses are
+# located from each "@" outwards instead of trying a match at every word
+LOCAL_TAIL_RX   = re.compile(r"[a-z0-9._%+-]+$")
+DOMAIN_RX       = re.compile(r"[a-z0-9.-]+\.[a-z]{2,}")
+MAILTO_RX       = re.compile(r"mailto:([a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,})")
+SCRIPT_OPEN_RX  = re.compile(r"<script")
+SCRIPT_CLOSE_RX = re.compile(r"</script")
+
+# Offline public-suffix snapshot: no network fetch, same answer every run
+_extract = tldextract.TLDExtract(suffix_list_urls=())
+
+
+@functools.lru_cache(maxsize=4096)
+def _registered(host):
+    # domain + suffix rather than .registered_domain, which newer tldextract
+    # deprecates with a warning on every call
+    ext = _extract(host)
+    registered = f"{ext.domain}.{ext.suffix}" if ext.domain and ext.suffix else host
+    return registered, ext.domain
+
+
+def _name_words(agency):
+    text = unicodedata.normalize("NFKD", agency.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_RX.findall(text)
+
+
+def _name_tokens(agency):
+    return {t for t in _name_words(agency) if len(t) >= 4 and t not in NAME_STOPWORDS}
+
+
+def _same_brand(label, other):
+    # "agency" on .es vs .com, "marbella-homes" vs "marbellahomes"
+    return bool(label) and label.replace("-", "") == other.replace("-", "")
+
+
+def is_junk_email(email):
+    """
+    True for addresses that can never be an agency contact: media file
+    names, template placeholders and known third-party domains.
+    """
+    email = email.lower()
+    local, _, domain = email.rpartition("@")
+    if not local or MEDIA_EXT_RX.search(email) or JUNK_LOCAL_RX.match(local):
+        return True
+    registered, _ = _registered(domain)
+    return domain in JUNK_DOMAINS or registered in JUNK_DOMAINS
+
+
+def page_features(html="", site="", agency=""):
+    """
+    Everything score_email needs from the page, site and agency, computed
+    once per page: lowercased HTML, first position of each literal address,
+    mailto targets, inline-script spans and the site / agency-name features.
+    """
+    lowered = html.lower()
+    positions = {}
+    at = lowered.find("@")
+    while at >= 0:
+        local = LOCAL_TAIL_RX.search(lowered, max(0, at - 64), at)
+        domain = DOMAIN_RX.match(lowered, at + 1)
+        if local and domain:
+            positions.setdefault(f"{local.group(0)}@{domain.group(0)}", local.start())
+        at = lowered.find("@", at + 1)
+    site_registered, site_label = (
+        _registered(site.split("//")[-1].split("/")[0].split(":")[0].lower()) if site else ("", "")
+    )
+    return {
+        "html": lowered,
+        "positions": positions,
+        "mailto": set(MAILTO_RX.findall(lowered)),
+        "script_starts": [m.start() for m in SCRIPT_OPEN_RX.finditer(lowered)],
+        "script_ends": [m.start() for m in SCRIPT_CLOSE_RX.finditer(lowered)],
+        "site_registered": site_registered,
+        "site_label": site_label,
+        "tokens": _name_tokens(agency) if agency else set(),
+        "compact_name": "".join(_name_words(agency)),
+    }
+
+
+def _last_before(starts, pos):
+    i = bisect.bisect_left(starts, pos)
+    return starts[i - 1] if i else -1
+
+
+def score_email(email, html="", site="", agency="", features=None):
+    """
+    Relevance of `email` to the agency at `site`: domain match with the site,
+    agency-name tokens in the address, and where it appeared in `html`.
+    Pass `features` from page_features() when scoring many emails of one
+    page. Junk addresses score None.
+    """
+    if is_junk_email(email):
+        return None
+    f = features or page_features(html, site, agency)
+    email = email.lower()
+    local, _, domain = email.rpartition("@")
+    registered, label = _registered(domain)
+    tokens = f["tokens"]
+    score = 0
+
+    # 1) Domain evidence
+    if f["site_registered"] and (registered == f["site_registered"] or _same_brand(label, f["site_label"])):
+        score += 10
+    elif any(t in label for t in tokens) or _same_brand(label, f["compact_name"]):
+        score += 5
+    elif registered in PROVIDER_DOMAINS:
+        score += 1 + (2 if any(t in local for t in tokens) else 0)
+    else:
+        score -= 3  # no link to the agency; ranked last, not dropped
+
+    # 2) Where it appeared on the page
+    if f["html"]:
+        pos = f["positions"].get(email)
+        if pos is None:
+            pos = f["html"].find(email)
+        if email in f["mailto"]:
+            score += 3
+        elif pos < 0:
+            score += 2  # only recoverable after de-obfuscation: deliberately hidden
+        elif _last_before(f["script_starts"], pos) > _last_before(f["script_ends"], pos):
+            score -= 2  # inside inline JS (tracking configs, widgets)
+        else:
+            score += 1
+    return score
+
+
+def rank_emails(emails, html="", site="", agency="", top_n=TOP_N):
+    """
+    Drop junk and return at most `top_n` of the rest, best first (ties
+    alphabetical). Addresses without agency evidence are kept, ranked last.
+    """
+    features = page_features(html, site, agency)
+    scored = []
+    for email in emails:
+        score = score_email(email, features=features)
+        if score is not None:
+            scored.append((-score, email))
+    return [email for _, email in sorted(scored)[:top_n]]
@@ -1,17 +1,28 @@
 import os
+import argparse
 import re
-import csv
 import time
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 from requests_html import HTMLSession, HTML
 
+import dns_cache
+import results_store
+from contact_matcher import scan_contact_links, rank_urls
+from deobfuscate import deobfuscate_emails
+from email_rank import rank_emails, is_junk_email
+from profiling import span, traced, add_profile_args, run_entry_point
+from scraper_log import get_logger, setup_logging
+
 # --- CONFIGURATION ---
 API_KEY    = os.environ.get("GOOGLE_API_KEY")    # Your Google API key
 CX         = os.environ.get("GOOGLE_CX")         # Your Custom Search Engine ID
+CSE_URL    = os.environ.get("CSE_URL", "https://www.googleapis.com/customsearch/v1")  # Search backend (fakes.FakeCSEServer offline)
 CSV_IN     = "idealista(1).csv"                  # Input CSV from Web Scraper
-OUT_CSV    = "out_combined.csv"                  # Combined output CSV
+OUT_CSV    = "out_combined.csv"                  # Combined output CSV (exported from results_store)
+PREFETCH_BATCH = 10                              # Agencies whose DNS is warmed ahead of scraping
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -19,12 +30,9 @@ USER_AGENT = (
 )
 # ------------------------
 
-# Regexes for extracting emails and matching “contact” links
+# Regexes for extracting emails; “contact” links are scored by contact_matcher
 EMAIL_RX      = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 MAILTO_RX     = re.compile(r'href=[\'"]mailto:([^\'"]+)[\'"]', re.IGNORECASE)
-HREF_CONTA_RX = re.compile(r'href=[\'"]([^\'"]*contac[^\'"]*)[\'"]', re.IGNORECASE)
-CONTACT_RX    = re.compile(r"contac|contacto|contatto|kontakt|contato|contact-us|contacter", 
-                           re.IGNORECASE)
 
 # Static fallback suffixes (no rendering)
 CONTACT_SUFFIXES = (
@@ -37,85 +45,177 @@ SKIP_EXTENSIONS = {
     ".doc", ".docx", ".xls", ".xlsx", ".zip", ".rar"
 }
 
+# Fetch budget: anything that is not HTML, or bigger than this, is not worth
+# downloading in full just to look for an email address
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+MAX_HTML_BYTES     = 1_000_000
+CHUNK_BYTES        = 64 * 1024
+
+# Candidate pages of one agency are raced with at most this many requests
+# in flight against its host
+PROBE_CONCURRENCY  = 3
+# Step E probes every static suffix at once: they are cheap HEADs and the
+# step should cost about one HEAD + GET timeout, not one per wave
+SUFFIX_CONCURRENCY = len(CONTACT_SUFFIXES)
+# Steps B/D race plain GETs over every contact-type link, but only this many
+# of the best-scoring ones are rendered when that finds nothing
+MAX_CONTACT_RENDERS = 3
+
 session = HTMLSession()
+log = get_logger("extractor")
+page_log = get_logger("page")
 
 
+@traced("cse")
 def google_search_site(query):
     """
     Uses Google Custom Search API to look up `query`, excluding idealista.
     Returns the first non‐Idealista link or None.
     """
-    print(f"    [DEBUG] CSE Query: {query}")
+    log.debug("CSE Query: %s", query)
     try:
         resp = requests.get(
-            "https://www.googleapis.com/customsearch/v1",
+            CSE_URL,
             params={'key': API_KEY, 'cx': CX, 'q': query},
             timeout=10
         )
-        print(f"    [DEBUG] → CSE HTTP status: {resp.status_code}")
+        log.debug("→ CSE HTTP status: %s", resp.status_code)
         resp.raise_for_status()
         items = resp.json().get("items", [])
-        print(f"    [DEBUG] → Number of CSE results: {len(items)}")
+        log.debug("→ Number of CSE results: %s", len(items))
         for idx, item in enumerate(items):
             link = item.get("link")
-            print(f"        [DEBUG] Result {idx+1}: {link}")
+            page_log.debug("Result %s: %s", idx+1, link)
             if link and "idealista.com" not in link:
-                print(f"    [DEBUG] → Using: {link}")
+                log.debug("→ Using: %s", link)
                 return link
-        print("    [DEBUG] → No non-Idealista link found in CSE results.")
+        log.debug("→ No non-Idealista link found in CSE results.")
         return None
     except Exception as e:
-        print(f"    [DEBUG] Google CSE request failed: {e}")
+        log.debug("Google CSE request failed: %s", e)
         return None
 
 
-def fetch_plain_html(url):
+def is_html_response(headers):
     """
-    Simple GET (no JS rendering) and return raw HTML, or "" on failure.
+    True if the Content-Type looks like a page (or is missing altogether).
     """
-    print(f"    [DEBUG] Plain GET: {url}")
+    ctype = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+    return not ctype or ctype in HTML_CONTENT_TYPES
+
+
+def read_capped(r, max_bytes=MAX_HTML_BYTES):
+    """
+    Read a streamed response up to `max_bytes` and decode only that much.
+    """
+    body = bytearray()
+    for chunk in r.iter_content(CHUNK_BYTES):
+        body += chunk
+        if len(body) >= max_bytes:
+            page_log.debug("→ Byte cap reached (%s), truncating %s", max_bytes, r.url)
+            break
+    return bytes(body[:max_bytes]).decode(r.encoding or "utf-8", errors="replace")
+
+
+@traced("fetch")
+def fetch_plain_html(url, max_bytes=MAX_HTML_BYTES):
+    """
+    Simple streamed GET (no JS rendering) and return raw HTML, or "" on
+    failure. Non-HTML responses are dropped after the headers, and bodies
+    are cut off at `max_bytes`.
+    """
+    log.debug("Plain GET: %s", url)
     try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=10)
-        print(f"    [DEBUG] → HTTP status: {r.status_code}")
-        r.raise_for_status()
-        return r.text
+        with requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=10, stream=True) as r:
+            log.debug("→ HTTP status: %s", r.status_code)
+            r.raise_for_status()
+            if not is_html_response(r.headers):
+                log.debug("→ Not HTML (%s), skipping body", r.headers.get('Content-Type'))
+                return ""
+            return read_capped(r, max_bytes)
     except Exception as e:
-        print(f"    [DEBUG] Plain GET failed for {url}: {e}")
+        log.debug("Plain GET failed for %s: %s", url, e)
         return ""
 
 
+@traced("head")
+def probe_html(url):
+    """
+    Cheap HEAD check before downloading a guessed URL. Returns False only
+    when the server clearly says there is no HTML page there; servers that
+    refuse HEAD get the benefit of the doubt.
+    """
+    try:
+        r = requests.head(url, headers={"User-Agent": USER_AGENT}, timeout=5,
+                          allow_redirects=True)
+    except Exception as e:
+        page_log.debug("HEAD failed for %s: %s", url, e)
+        return False
+    if r.status_code in (405, 501):
+        return True
+    if r.status_code >= 400:
+        page_log.debug("→ HEAD %s for %s, skipping", r.status_code, url)
+        return False
+    if not is_html_response(r.headers):
+        page_log.debug("→ HEAD says %s for %s, skipping", r.headers.get('Content-Type'), url)
+        return False
+    return True
+
+
+@traced("render")
 def fetch_rendered_html(url):
     """
     GET + .render() the URL via requests_html. Return rendered HTML or "" on failure.
     """
-    print(f"    [DEBUG] Rendering: {url}")
+    log.debug("Rendering: %s", url)
     try:
-        r = session.get(url, headers={"User-Agent": USER_AGENT}, timeout=15)
-        print(f"    [DEBUG] → HTTP status: {r.status_code}")
-        r.html.render(timeout=10, sleep=2)
-        rendered = r.html.html or ""
-        print(f"    [DEBUG] → Render length: {len(rendered)} chars")
+        with session.get(url, headers={"User-Agent": USER_AGENT}, timeout=15, stream=True) as r:
+            log.debug("→ HTTP status: %s", r.status_code)
+            # Never spin up a render for a PDF or a huge download
+            if not is_html_response(r.headers):
+                log.debug("→ Not HTML (%s), skipping render", r.headers.get('Content-Type'))
+                return ""
+            if int(r.headers.get("Content-Length") or 0) > MAX_HTML_BYTES:
+                log.debug("→ Too large (%s bytes), skipping render", r.headers['Content-Length'])
+                return ""
+            # Chunked responses have no Content-Length: only the capped body
+            # is ever handed to Chromium
+            page = HTML(session=session, url=r.url, html=read_capped(r))
+        with span("render.js", url=url):
+            page.render(timeout=10, sleep=2)
+        rendered = page.html or ""
+        log.debug("→ Render length: %s chars", len(rendered))
         return rendered
     except Exception as e:
-        print(f"    [DEBUG] → Render failed for {url}: {e}")
+        log.debug("→ Render failed for %s: %s", url, e)
         return ""
 
-def extract_emails(html):
+@traced("extract", arg=1)  # the site, not the page HTML
+def extract_emails(html, site="", agency=""):
     """
-    Return a sorted list of unique emails found in `html`.
+    Return unique emails found in `html`, including Cloudflare-protected,
+    entity-encoded, "[at]" and JS-assembled forms. Junk addresses are
+    dropped; given the `site` or `agency` name, the rest are ranked by
+    relevance (best first, top few only), otherwise sorted.
     """
     found = set(EMAIL_RX.findall(html))
     found |= set(MAILTO_RX.findall(html))
-    emails = sorted(found)
-    print(f"        [DEBUG] extract_emails: found {len(emails)} => {emails}")
+    found |= deobfuscate_emails(html)
+    if site or agency:
+        emails = rank_emails(found, html, site, agency)
+    else:
+        emails = sorted(e for e in found if not is_junk_email(e))
+    page_log.debug("extract_emails: found %s => %s", len(emails), emails)
     return emails
 
-def find_contact_links(html):
+def find_contact_links(html, base_url):
     """
-    Return list of all hrefs matching the “contac…” regex in raw HTML.
+    Return hrefs of contact-type links in raw HTML that stay on `base_url`'s
+    host, best-scoring first. Link text, path and title are scored in one
+    pass by contact_matcher.
     """
-    links = HREF_CONTA_RX.findall(html)
-    print(f"        [DEBUG] find_contact_links: found {len(links)} raw hrefs")
+    links = [href for _, href in scan_contact_links(html, base_url)]
+    page_log.debug("find_contact_links: found %s raw hrefs", len(links))
     return links
 
 def get_internal_links(html, base_url):
@@ -126,8 +226,9 @@ def get_internal_links(html, base_url):
     """
     base_domain = urlparse(base_url).netloc
     links = set()
-    parsed_html = HTML(html=html)
-    for a in parsed_html.find("a"):
+    with span("parse", url=base_url):
+        anchors = HTML(html=html).find("a")
+    for a in anchors:
         href = a.attrs.get("href", "")
         if not href or href.startswith("mailto:"):
             continue
@@ -141,17 +242,18 @@ def get_internal_links(html, base_url):
             continue
         normalized = abs_link.split('#')[0].rstrip('/')
         links.add(normalized)
-    print(f"        [DEBUG] get_internal_links: found {len(links)} valid links on {base_url}")
+    page_log.debug("get_internal_links: found %s valid links on %s", len(links), base_url)
     return links
 
+@traced("deep")
 def deep_search_agency(agency_name, homepage_html=None, homepage_url=None):
     """
     Deep crawl: renders homepage if not provided, extracts emails.
-    Then prioritizes contact‐type links (via CONTACT_RX), renders and checks.
+    Then prioritizes contact‐type links (scored by contact_matcher), renders and checks.
     Finally, if still none, renders each remaining internal link until an email appears.
-    Returns list of found emails (or []).
+    Returns (emails, page_url) for the page they were found on, or ([], "").
     """
-    print(f"    [DEBUG] Starting deep_search_agency for: {agency_name}")
+    log.debug("Starting deep_search_agency for: %s", agency_name)
 
     # If homepage was already rendered once, reuse it; else fetch+render now
     if not homepage_html and homepage_url:
@@ -159,166 +261,284 @@ def deep_search_agency(agency_name, homepage_html=None, homepage_url=None):
 
     # Step 1: Extract from rendered homepage
     if homepage_html:
-        print("    [DEBUG] Deep‐search: extracting from rendered homepage")
-        emails = extract_emails(homepage_html)
+        log.debug("Deep‐search: extracting from rendered homepage")
+        emails = extract_emails(homepage_html, homepage_url, agency_name)
         if emails:
-            print(f"    [DEBUG] Deep‐search found on homepage: {emails}")
-            return emails
+            log.debug("Deep‐search found on homepage: %s", emails)
+            return emails, homepage_url
 
     # Step 2: Gather internal links (skipping non‐HTML resources)
     internal_links = set()
     if homepage_html and homepage_url:
         internal_links = get_internal_links(homepage_html, homepage_url)
 
-    # 2a: Prioritize contact‐type links
-    contact_links = [link for link in internal_links if CONTACT_RX.search(link)]
-    print(f"        [DEBUG] Deep‐search: found {len(contact_links)} contact‐type links")
+    # 2a: Prioritize contact‐type links, most promising first
+    contact_links, non_contact_links = rank_urls(internal_links)
+    log.debug("Deep‐search: found %s contact‐type links", len(contact_links))
     for idx, link in enumerate(contact_links, 1):
-        print(f"    [DEBUG] Deep‐search rendering contact {idx}/{len(contact_links)}: {link}")
+        log.debug("Deep‐search rendering contact %s/%s: %s", idx, len(contact_links), link)
         html_contact = fetch_rendered_html(link)
         if not html_contact:
-            print(f"    [DEBUG] → No HTML for {link}, skipping")
+            log.debug("→ No HTML for %s, skipping", link)
             continue
-        print(f"    [DEBUG] Deep‐search extracting from {link}")
-        found = extract_emails(html_contact)
+        log.debug("Deep‐search extracting from %s", link)
+        found = extract_emails(html_contact, homepage_url, agency_name)
         if found:
-            print(f"    [DEBUG] Deep‐search found on contact page {link}: {found}")
-            return found
+            log.debug("Deep‐search found on contact page %s: %s", link, found)
+            return found, link
         time.sleep(1)
 
     # 2b: Fallback to all other internal links
-    non_contact_links = [link for link in internal_links if link not in contact_links]
-    print(f"        [DEBUG] Deep‐search: {len(non_contact_links)} non‐contact links left")
+    log.debug("Deep‐search: %s non‐contact links left", len(non_contact_links))
     for idx, link in enumerate(non_contact_links, 1):
-        print(f"    [DEBUG] Deep‐search rendering link {idx}/{len(non_contact_links)}: {link}")
+        log.debug("Deep‐search rendering link %s/%s: %s", idx, len(non_contact_links), link)
         html_link = fetch_rendered_html(link)
         if not html_link:
-            print(f"    [DEBUG] → No HTML for {link}, skipping")
+            log.debug("→ No HTML for %s, skipping", link)
             continue
-        print(f"    [DEBUG] Deep‐search extracting from {link}")
-        found = extract_emails(html_link)
+        log.debug("Deep‐search extracting from %s", link)
+        found = extract_emails(html_link, homepage_url, agency_name)
         if found:
-            print(f"    [DEBUG] Deep‐search found on {link}: {found}")
-            return found
+            log.debug("Deep‐search found on %s: %s", link, found)
+            return found, link
         time.sleep(1)
 
-    print("    [DEBUG] Deep‐search completed, no emails found")
-    return []
+    log.debug("Deep‐search completed, no emails found")
+    return [], ""
+
+def race_for_emails(urls, fetch, site="", agency="", concurrency=PROBE_CONCURRENCY):
+    """
+    Fetch `urls` concurrently (`concurrency` at a time, in the given
+    order) and return (emails, url) for the first page that yields any.
+    Pending fetches are cancelled as soon as one wins. Returns ([], "") if
+    no candidate has an email.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return [], ""
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, len(urls)))
+    futures = {
+        pool.submit(lambda u: extract_emails(fetch(u), site, agency), url): url
+        for url in urls
+    }
+    try:
+        for future in as_completed(futures):
+            try:
+                found = future.result()
+            except Exception as e:
+                log.debug("Candidate %s failed: %s", futures[future], e)
+                continue
+            if found:
+                return found, futures[future]
+        return [], ""
+    finally:
+        # Requests already on the wire finish in the background; we don't wait
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_until_emails(urls, site="", agency=""):
+    """
+    Render `urls` one by one (requests_html renders are not thread-safe)
+    and return (emails, url) for the first page with emails, or ([], "").
+    """
+    for url in dict.fromkeys(urls):
+        html = fetch_rendered_html(url)
+        if html:
+            found = extract_emails(html, site, agency)
+            if found:
+                return found, url
+    return [], ""
+
+
+def fetch_if_html(url):
+    """
+    HEAD-probe a guessed URL and only download it if it looks like a page.
+    """
+    return fetch_plain_html(url) if probe_html(url) else ""
+
 
-def main():
+def search_agency_site(name):
+    """
+    Google CSE lookup of the homepage URL for agency `name`, or None.
+    """
+    query = f"{name} real estate marbella -site:idealista.com -site:linkedin.com -site:instagram.com -site:facebook.com -site:properstar.com -site:aplaceinthesun.com"
+    return google_search_site(query)
+
+
+def scrape_agency(name, site):
+    """
+    Run steps A–F against `site` for agency `name`, stopping at the first
+    step that yields emails. Returns (emails, method, page_url, timings,
+    status) where page_url is the page the emails were found on ("" if
+    unknown), timings maps each step that ran to its duration in seconds and
+    status is "ok", "no-email" or "fetch-error" (site unreachable).
+    """
+    timings = {}
+    page_url = ""
+
+    # Dead domains fail here in milliseconds instead of once per step
+    started = time.perf_counter()
+    with span("dns", url=site):
+        resolves = dns_cache.host_resolves(urlparse(site).hostname)
+    timings["dns"] = round(time.perf_counter() - started, 3)
+    if not resolves:
+        log.warning("DNS lookup failed for %s, skipping", site)
+        return [], "none", page_url, timings, "fetch-error"
+
+    emails = []
+    method = ""
+    rendered_home = ""  # store if we render homepage
+
+    # Step A: Plain GET homepage
+    started = time.perf_counter()
+    html_plain = fetch_plain_html(site)
+    if html_plain:
+        emails = extract_emails(html_plain, site, name)
+        if emails:
+            method = "plain"
+            page_url = site
+            log.debug("Found in plain HTML: %s", emails)
+    timings["plain"] = round(time.perf_counter() - started, 3)
+
+    # Step B: If still none, contact‐links in raw HTML
+    if not emails and html_plain:
+        started = time.perf_counter()
+        contac_hrefs = find_contact_links(html_plain, site)
+        log.debug("Plain HTML contact‐links: %s", contac_hrefs)
+        candidates = [urljoin(site, href) for href in contac_hrefs]
+        # Race cheap plain GETs first; only render if none of them has an email
+        emails, full_url = race_for_emails(candidates, fetch_plain_html, site, name)
+        if not emails:
+            emails, full_url = render_until_emails(candidates[:MAX_CONTACT_RENDERS], site, name)
+        if emails:
+            method = "plain-contact"
+            page_url = full_url
+            log.debug("Found on contact‐type page (plain) %s: %s", full_url, emails)
+        timings["plain-contact"] = round(time.perf_counter() - started, 3)
+
+    # Step C: If still none, render homepage
+    if not emails:
+        started = time.perf_counter()
+        rendered_home = fetch_rendered_html(site)
+        if rendered_home:
+            emails = extract_emails(rendered_home, site, name)
+            if emails:
+                method = "rendered"
+                page_url = site
+                log.debug("Found in rendered homepage: %s", emails)
+        timings["rendered"] = round(time.perf_counter() - started, 3)
+
+    # Step D: If still none, contact‐links in rendered HTML
+    if not emails and rendered_home:
+        started = time.perf_counter()
+        contac_hrefs = find_contact_links(rendered_home, site)
+        log.debug("Rendered HTML contact‐links: %s", contac_hrefs)
+        candidates = [urljoin(site, href) for href in contac_hrefs]
+        emails, full_url = race_for_emails(candidates, fetch_plain_html, site, name)
+        if not emails:
+            emails, full_url = render_until_emails(candidates[:MAX_CONTACT_RENDERS], site, name)
+        if emails:
+            method = "rendered-contact"
+            page_url = full_url
+            log.debug("Found on contact‐type page (rendered) %s: %s", full_url, emails)
+        timings["rendered-contact"] = round(time.perf_counter() - started, 3)
+
+    # Step E: If still none, static /contact… suffixes
+    if not emails:
+        started = time.perf_counter()
+        candidates = [urljoin(site.rstrip("/") + "/", suf) for suf in CONTACT_SUFFIXES]
+        emails, candidate = race_for_emails(
+            candidates, fetch_if_html, site, name, concurrency=SUFFIX_CONCURRENCY
+        )
+        if emails:
+            method = "static-suffix"
+            page_url = candidate
+            log.debug("Found via static suffix %s: %s", candidate, emails)
+        timings["static-suffix"] = round(time.perf_counter() - started, 3)
+
+    # Step F: If still none, deep‐search internal links
+    if not emails:
+        log.debug("No email found in A–E, falling back to deep‐search.")
+        started = time.perf_counter()
+        emails, deep_url = deep_search_agency(name, homepage_html=rendered_home, homepage_url=site)
+        if emails:
+            method = "deep"
+            page_url = deep_url
+        else:
+            method = "none"
+        timings["deep"] = round(time.perf_counter() - started, 3)
+
+    if emails:
+        status = "ok"
+    elif not html_plain and not rendered_home:
+        status = "fetch-error"
+    else:
+        status = "no-email"
+    return emails, method, page_url, timings, status
+
+
+def main(agencies=None, limit=None):
+    """
+    Scrape every agency in CSV_IN, or only `agencies` / the first `limit`.
+    """
     # 1) Load the Idealista CSV and grab the "names" column
     df = pd.read_csv(CSV_IN, encoding="utf-8")
     if "names" not in df.columns:
-        print(f"[ERROR] Input CSV has no 'names' column. Found: {df.columns.tolist()}")
+        log.error("Input CSV has no 'names' column. Found: %s", df.columns.tolist())
         return
-    agency_names = df["names"].dropna().astype(str).tolist()
+    agency_names = [n.strip() for n in df["names"].dropna().astype(str).tolist()]
+    if agencies:
+        agency_names = [n for n in agency_names if n in set(agencies)]
+    if limit:
+        agency_names = agency_names[:limit]
 
-    with open(OUT_CSV, "w", newline="", encoding="utf-8") as out_f:
-        writer = csv.writer(out_f)
-        writer.writerow(["agency", "email", "method"])
+    dns_cache.install()
+    store = results_store.open_store()
+    run_id = results_store.new_run_id("extractor")
 
-        for idx, name in enumerate(agency_names, 1):
-            name = name.strip()
-            if not name:
-                continue
-
-            print(f"\n[INFO] ({idx}/{len(agency_names)}) Processing: {name}")
-            # 2) Google CSE for homepage URL
-            query = f"{name} real estate marbella -site:idealista.com -site:linkedin.com -site:instagram.com -site:facebook.com -site:properstar.com -site:aplaceinthesun.com"
-            site = google_search_site(query)
-            if not site:
-                print(f"    [WARN] No site found for {name}")
-                writer.writerow([name, "", "none"])
-                time.sleep(1)
-                continue
-
-            emails = []
-            method = ""
-            rendered_home = ""  # store if we render homepage
-
-            # Step A: Plain GET homepage
-            html_plain = fetch_plain_html(site)
-            if html_plain:
-                emails = extract_emails(html_plain)
-                if emails:
-                    method = "plain"
-                    print(f"    [DEBUG] Found in plain HTML: {emails}")
-
-            # Step B: If still none, contact‐links in raw HTML
-            if not emails and html_plain:
-                contac_hrefs = find_contact_links(html_plain)
-                print(f"    [DEBUG] Plain HTML contact‐links: {contac_hrefs}")
-                for href in contac_hrefs:
-                    full_url = urljoin(site, href)
-                    html_contact = fetch_rendered_html(full_url)
-                    if html_contact:
-                        emails = extract_emails(html_contact)
-                        if emails:
-                            method = "plain-contact"
-                            print(f"    [DEBUG] Found on contact‐type page (plain) {full_url}: {emails}")
-                            break
-
-            # Step C: If still none, render homepage
-            if not emails:
-                rendered_home = fetch_rendered_html(site)
-                if rendered_home:
-                    emails = extract_emails(rendered_home)
-                    if emails:
-                        method = "rendered"
-                        print(f"    [DEBUG] Found in rendered homepage: {emails}")
-
-            # Step D: If still none, contact‐links in rendered HTML
-            if not emails and rendered_home:
-                contac_hrefs = find_contact_links(rendered_home)
-                print(f"    [DEBUG] Rendered HTML contact‐links: {contac_hrefs}")
-                for href in contac_hrefs:
-                    full_url = urljoin(site, href)
-                    html_contact = fetch_rendered_html(full_url)
-                    if html_contact:
-                        emails = extract_emails(html_contact)
-                        if emails:
-                            method = "rendered-contact"
-                            print(f"    [DEBUG] Found on contact‐type page (rendered) {full_url}: {emails}")
-                            break
-
-            # Step E: If still none, static /contact… suffixes
-            if not emails:
-                for suf in CONTACT_SUFFIXES:
-                    candidate = urljoin(site.rstrip("/") + "/", suf)
-                    try:
-                        r = requests.get(candidate, headers={"User-Agent": USER_AGENT}, timeout=10)
-                        r.raise_for_status()
-                        txt = r.text
-                        found = extract_emails(txt)
-                        if found:
-                            emails = found
-                            method = "static-suffix"
-                            print(f"    [DEBUG] Found via static suffix {candidate}: {emails}")
-                            break
-                    except Exception:
-                        continue
-
-            # Step F: If still none, deep‐search internal links
-            if not emails:
-                print("    [DEBUG] No email found in A–E, falling back to deep‐search.")
-                emails = deep_search_agency(name, homepage_html=rendered_home, homepage_url=site)
+    try:
+        for start in range(0, len(agency_names), PREFETCH_BATCH):
+            # 2) Google CSE for a batch of homepage URLs, then warm DNS for all
+            #    of them in the background while we scrape one by one
+            batch = [
+                (idx, name, search_agency_site(name) if name else None)
+                for idx, name in enumerate(agency_names[start:start + PREFETCH_BATCH], start + 1)
+            ]
+            dns_cache.prefetch(urlparse(site).hostname for _, _, site in batch if site)
+
+            for idx, name, site in batch:
+                if not name:
+                    continue
+
+                log.info("(%s/%s) Processing: %s", idx, len(agency_names), name)
+                if not site:
+                    log.warning("No site found for %s", name)
+                    results_store.record_agency(store, run_id, name, "", [], "none")
+                    time.sleep(1)
+                    continue
+
+                with span("agency", agency=name):
+                    emails, method, page_url, timings, status = scrape_agency(name, site)
+
+                # Record results (committed per agency)
+                results_store.record_agency(
+                    store, run_id, name, site, emails, method,
+                    page_url=page_url, timings=timings, status=status
+                )
                 if emails:
-                    method = "deep"
+                    log.info("FOUND %s (method=%s)", emails, method)
                 else:
-                    method = "none"
-
-            # Write results to CSV
-            if emails:
-                for e in emails:
-                    writer.writerow([name, e, method])
-                print(f"  [FOUND] {emails} (method={method})")
-            else:
-                writer.writerow([name, "", method])
-                print(f"  [NONE FOUND] (method={method})")
+                    log.info("NONE FOUND (method=%s)", method)
 
-            out_f.flush()
-            time.sleep(1)  # polite pause between agencies
+                time.sleep(1)  # polite pause between agencies
+    finally:
+        # CSV stays available as an export of this run
+        results_store.export_csv(store, OUT_CSV, run_id=run_id)
+        store.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Find agency emails (steps A–F).")
+    add_profile_args(parser)
+    setup_logging()
+    run_entry_point(main, parser.parse_args(), "extractor")
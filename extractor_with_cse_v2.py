@@ -1,16 +1,25 @@
 import os
+import argparse
 import re
-import csv
 import time
 import requests
 from urllib.parse import urljoin, urlparse
 from requests_html import HTMLSession, HTML
 
+import dns_cache
+import results_store
+from contact_matcher import rank_urls
+from deobfuscate import deobfuscate_emails
+from email_rank import rank_emails, is_junk_email
+from profiling import span, traced, add_profile_args, run_entry_point
+from scraper_log import get_logger, setup_logging
+
 # --- CONFIGURATION ---
 API_KEY    = os.environ.get("GOOGLE_API_KEY")   # Your Google API key
 CX         = os.environ.get("GOOGLE_CX")        # Your Custom Search Engine ID
-OUT_CSV    = "out.csv"                          # CSV containing agencies and emails from previous run
-CSV_DEEP   = "out_deep.csv"                     # New CSV with results of deep search
+CSE_URL    = os.environ.get("CSE_URL", "https://www.googleapis.com/customsearch/v1")  # Search backend (fakes.FakeCSEServer offline)
+OUT_CSV    = "out.csv"                          # web_scraper-kyero.py output, imported if it never recorded to the store
+CSV_DEEP   = "out_deep.csv"                     # CSV export of this deep-search run
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -21,66 +30,74 @@ USER_AGENT = (
 EMAIL_RX      = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 MAILTO_RX     = re.compile(r'href=[\'"]mailto:([^\'"]+)[\'"]', re.IGNORECASE)
 
-# New regex to detect "contact" pages in multiple languages/formats
-CONTACT_RX    = re.compile(r"contac|contacto|contatto|kontakt|contato|contact-us|contacter", re.IGNORECASE)
-
 session = HTMLSession()
+log = get_logger("deep")
+page_log = get_logger("page")
 
 
+@traced("cse")
 def google_search_site(query):
     """
     Uses Google Custom Search API to look up `query`, excluding idealista.
     Returns first non-Idealista link or None.
     """
-    print(f"    [DEBUG] CSE Query: {query}")
+    log.debug("CSE Query: %s", query)
     try:
         resp = requests.get(
-            "https://www.googleapis.com/customsearch/v1",
+            CSE_URL,
             params={'key': API_KEY, 'cx': CX, 'q': query},
             timeout=10
         )
-        print(f"    [DEBUG] → CSE HTTP status: {resp.status_code}")
+        log.debug("→ CSE HTTP status: %s", resp.status_code)
         resp.raise_for_status()
         items = resp.json().get("items", [])
-        print(f"    [DEBUG] → Number of CSE results: {len(items)}")
+        log.debug("→ Number of CSE results: %s", len(items))
         for idx, item in enumerate(items):
             link = item.get("link")
-            print(f"        [DEBUG] Result {idx+1}: {link}")
+            page_log.debug("Result %s: %s", idx+1, link)
             if link and "idealista.com" not in link:
-                print(f"    [DEBUG] → Using: {link}")
+                log.debug("→ Using: %s", link)
                 return link
-        print("    [DEBUG] → No non-Idealista link found in CSE results.")
+        log.debug("→ No non-Idealista link found in CSE results.")
         return None
     except Exception as e:
-        print(f"    [DEBUG] Google CSE request failed: {e}")
+        log.debug("Google CSE request failed: %s", e)
         return None
 
 
+@traced("render")
 def fetch_rendered_html(url):
     """
     Fetch and fully render a URL using requests_html. Returns HTML text or "".
     """
-    print(f"    [DEBUG] Fetching & rendering: {url}")
+    log.debug("Fetching & rendering: %s", url)
     try:
         r = session.get(url, headers={"User-Agent": USER_AGENT}, timeout=15)
-        print(f"    [DEBUG] → HTTP status: {r.status_code}")
-        r.html.render(timeout=10, sleep=2)
-        print(f"    [DEBUG] → Render complete: {url} (length {len(r.html.html)} chars)")
+        log.debug("→ HTTP status: %s", r.status_code)
+        with span("render.js", url=url):
+            r.html.render(timeout=10, sleep=2)
+        log.debug("→ Render complete: %s (length %s chars)", url, len(r.html.html))
         return r.html.html
     except Exception as e:
-        print(f"    [DEBUG] → Render failed for {url}: {e}")
+        log.debug("→ Render failed for %s: %s", url, e)
         return ""
 
 
-def extract_emails(html):
+@traced("extract", arg=1)  # the site, not the page HTML
+def extract_emails(html, site="", agency=""):
     """
-    Extracts email addresses (plain or mailto:) from HTML text.
-    Returns sorted list of unique emails.
+    Extracts email addresses (plain, mailto: or obfuscated) from HTML text.
+    Returns unique non-junk emails, ranked by relevance to `site`/`agency`
+    when given, sorted otherwise.
     """
     found = set(EMAIL_RX.findall(html))
     found |= set(MAILTO_RX.findall(html))
-    emails = sorted(found)
-    print(f"        [DEBUG] extract_emails: found {len(emails)} => {emails}")
+    found |= deobfuscate_emails(html)
+    if site or agency:
+        emails = rank_emails(found, html, site, agency)
+    else:
+        emails = sorted(e for e in found if not is_junk_email(e))
+    page_log.debug("extract_emails: found %s => %s", len(emails), emails)
     return emails
 
 
@@ -91,8 +108,9 @@ def get_internal_links(html, base_url):
     """
     base_domain = urlparse(base_url).netloc
     links = set()
-    parsed_html = HTML(html=html)
-    for a in parsed_html.find("a"):
+    with span("parse", url=base_url):
+        anchors = HTML(html=html).find("a")
+    for a in anchors:
         href = a.attrs.get("href", "")
         if not href or href.startswith("mailto:"):
             continue
@@ -101,125 +119,136 @@ def get_internal_links(html, base_url):
         if parsed.netloc == base_domain:
             normalized = abs_link.split('#')[0].rstrip('/')
             links.add(normalized)
-    print(f"        [DEBUG] get_internal_links: found {len(links)} links on {base_url}")
+    page_log.debug("get_internal_links: found %s links on %s", len(links), base_url)
     return links
 
 
+@traced("deep")
 def deep_search_agency(agency_name):
     """
     Perform a deep search for emails for a single agency:
     1) Use Google CSE to find homepage URL.
     2) Fetch and render homepage; extract emails.
-    3) If none found, identify any contact‐page links first (via CONTACT_RX).
+    3) If none found, identify any contact‐page links first (via contact_matcher).
        – Render each contact link and check for emails.
        – If still none, iterate all other internal links (rendered) and check for emails.
-    Returns list of found emails (possibly empty).
+    Returns (emails, page_url, site): the emails (possibly empty), the page
+    they were found on and the homepage CSE returned ("" when not found).
     """
-    print(f"    [DEBUG] Starting deep_search_agency for: {agency_name}")
+    log.debug("Starting deep_search_agency for: %s", agency_name)
     query = f"{agency_name} real estate marbella -site:idealista.com -site:properstar.com -site:aplaceinthesun.com -site:linkedin.com -site:instagram.com, -site:facebook.com"
     site = google_search_site(query)    
     if not site:
-        print("    [DEBUG] → No site found via CSE.")
-        return []
+        log.debug("→ No site found via CSE.")
+        return [], "", ""
 
-    print(f"    [DEBUG] Homepage URL: {site}")
+    log.debug("Homepage URL: %s", site)
     # 1) Render homepage and extract emails
     html_home = fetch_rendered_html(site)
     emails = []
     if html_home:
-        print("    [DEBUG] Extracting emails from rendered homepage...")
-        emails = extract_emails(html_home)
+        log.debug("Extracting emails from rendered homepage...")
+        emails = extract_emails(html_home, site, agency_name)
         if emails:
-            print(f"    [DEBUG] Emails found on homepage: {emails}")
-            return emails
+            log.debug("Emails found on homepage: %s", emails)
+            return emails, site, site
         else:
-            print("    [DEBUG] No emails on homepage, searching for contact‐page links first.")
+            log.debug("No emails on homepage, searching for contact‐page links first.")
 
     # 2) Gather internal links from homepage
     internal_links = get_internal_links(html_home, site) if html_home else set()
 
-    # 2a) Filter for contact‐type links first
-    contact_links = [link for link in internal_links if CONTACT_RX.search(link)]
-    print(f"        [DEBUG] Found {len(contact_links)} contact‐type links via regex.")
+    # 2a) Filter for contact‐type links first, most promising first
+    contact_links, non_contact_links = rank_urls(internal_links)
+    log.debug("Found %s contact‐type links via keyword matcher.", len(contact_links))
     for idx, link in enumerate(contact_links, 1):
-        print(f"    [DEBUG] Fetching contact link {idx}/{len(contact_links)}: {link}")
+        log.debug("Fetching contact link %s/%s: %s", idx, len(contact_links), link)
         html_contact = fetch_rendered_html(link)
         if not html_contact:
-            print(f"    [DEBUG] → Skipping (no HTML) for {link}")
+            log.debug("→ Skipping (no HTML) for %s", link)
             continue
-        print(f"    [DEBUG] Extracting emails from contact page: {link}")
-        found = extract_emails(html_contact)
+        log.debug("Extracting emails from contact page: %s", link)
+        found = extract_emails(html_contact, site, agency_name)
         if found:
-            print(f"    [DEBUG] Emails found on contact page {link}: {found}")
-            return found
+            log.debug("Emails found on contact page %s: %s", link, found)
+            return found, link, site
         else:
-            print(f"    [DEBUG] No emails on contact page {link}, continuing.")
+            log.debug("No emails on contact page %s, continuing.", link)
         time.sleep(1)
 
     # 2b) If still no emails, iterate all other internal links
-    non_contact_links = [link for link in internal_links if link not in contact_links]
-    print(f"        [DEBUG] Falling back to {len(non_contact_links)} non‐contact links.")
+    log.debug("Falling back to %s non‐contact links.", len(non_contact_links))
     for idx, link in enumerate(non_contact_links, 1):
-        print(f"    [DEBUG] Fetching internal link {idx}/{len(non_contact_links)}: {link}")
+        log.debug("Fetching internal link %s/%s: %s", idx, len(non_contact_links), link)
         html_link = fetch_rendered_html(link)
         if not html_link:
-            print(f"    [DEBUG] → Skipping (no HTML) for {link}")
+            log.debug("→ Skipping (no HTML) for %s", link)
             continue
-        print(f"    [DEBUG] Extracting emails from: {link}")
-        found = extract_emails(html_link)
+        log.debug("Extracting emails from: %s", link)
+        found = extract_emails(html_link, site, agency_name)
         if found:
-            print(f"    [DEBUG] Emails found on {link}: {found}")
-            return found
+            log.debug("Emails found on %s: %s", link, found)
+            return found, link, site
         else:
-            print(f"    [DEBUG] No emails on {link}, continuing.")
+            log.debug("No emails on %s, continuing.", link)
         time.sleep(1)
 
-    print("    [DEBUG] Completed deep search, no emails found.")
-    return []
+    log.debug("Completed deep search, no emails found.")
+    return [], "", site
 
 
-def main():
+def main(agencies=None, limit=None):
+    """
+    Deep-search every agency still missing an email, or only `agencies` /
+    the first `limit` of them.
+    """
     # ----------------------------------------------------------------------------
-    # 1) Read out.csv with csv.reader
+    # 1) Query the results store for agencies of the latest kyero run that
+    #    are missing all emails
     # ----------------------------------------------------------------------------
-    print("[INFO] Reading existing out.csv to find agencies missing all emails…")
-    agency_email_map = {}  # agency_name -> list of all emails (could be empty)
-    with open(OUT_CSV, newline="", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader, None)  # skip header
-        for row in reader:
-            if not row:
-                continue
-            agency = row[0]
-            email = row[-1].strip() if len(row) >= 2 else ""
-            agency_email_map.setdefault(agency, []).append(email)
-
-    missing_agencies = [
-        agency
-        for agency, emails in agency_email_map.items()
-        if all(e == "" for e in emails)
-    ]
-    print(f"[INFO] Found {len(missing_agencies)} agencies with no email so far.")
+    store = results_store.open_store()
+    kyero_run = results_store.latest_run_id(store, "kyero")
+    if kyero_run is None:
+        log.info("No kyero run in the results store, importing %s…", OUT_CSV)
+        kyero_run = results_store.new_run_id("kyero-import")
+        results_store.import_csv(store, OUT_CSV, run_id=kyero_run)
+
+    missing_agencies = results_store.missing_agencies(store, run_id=kyero_run)
+    if agencies:
+        missing_agencies = [a for a in missing_agencies if a in set(agencies)]
+    if limit:
+        missing_agencies = missing_agencies[:limit]
+    log.info("Found %s agencies with no email so far.", len(missing_agencies))
 
     # ----------------------------------------------------------------------------
     # 2) Deep-search every missing agency
     # ----------------------------------------------------------------------------
-    with open(CSV_DEEP, "w", newline="", encoding="utf-8") as out_f:
-        writer = csv.writer(out_f)
-        writer.writerow(["agency", "email", "method"])  # method: "deep" or "none"
-
+    dns_cache.install()
+    run_id = results_store.new_run_id("deep")
+    try:
         for idx, agency in enumerate(missing_agencies, 1):
-            print(f"\n[INFO] ({idx}/{len(missing_agencies)}) Deep searching: {agency}")
-            emails = deep_search_agency(agency)
+            log.info("(%s/%s) Deep searching: %s", idx, len(missing_agencies), agency)
+            started = time.perf_counter()
+            emails, page_url, site = deep_search_agency(agency)
+            method = "deep" if emails else "none"
+            results_store.record_agency(
+                store, run_id, agency, site, emails, method, page_url=page_url,
+                timings={"deep": round(time.perf_counter() - started, 3)}
+            )
             if emails:
                 for e in emails:
-                    writer.writerow([agency, e, "deep"])
-                    print(f"  [FOUND] {e}")
+                    log.info("FOUND %s", e)
             else:
-                writer.writerow([agency, "", "none"])
-                print(f"  [NONE FOUND]")
+                log.info("NONE FOUND")
             time.sleep(2)  # polite pause between agencies
+    finally:
+        # method: "deep" or "none"
+        results_store.export_csv(store, CSV_DEEP, run_id=run_id)
+        store.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Deep-search agencies that still have no email.")
+    add_profile_args(parser)
+    setup_logging()
+    run_entry_point(main, parser.parse_args(), "deep")
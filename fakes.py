@@ -0,0 +1,187 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import dns.name
+import dns.resolver
+
+# Local stand-ins for the live services the scrapers talk to, so the
+# pipeline can be run and benchmarked offline:
+#   FakeCSEServer     - Google Custom Search JSON API     (CSE_URL)
+#   FakeSiteServer    - agency websites, routed by Host header
+#   ZoneFileResolver  - DNS answers from a zone file       (dns_cache.set_backend)
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+
+class _Server:
+    """
+    ThreadingHTTPServer on 127.0.0.1 running in a daemon thread.
+    Usable as a context manager.
+    """
+
+    handler = _QuietHandler
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _make_handler(self):
+        owner = self
+
+        class Handler(self.handler):
+            server_owner = owner
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _CSEHandler(_QuietHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        links = self.server_owner.lookup(query)
+        self._send(200, json.dumps({"items": [{"link": l} for l in links]}), "application/json")
+
+
+class FakeCSEServer(_Server):
+    """
+    Answers /customsearch/v1?q=... from `results`, a {agency name: [links]}
+    dict; the first agency name contained in the query wins. Point CSE_URL
+    at `.url` to use it.
+    """
+
+    handler = _CSEHandler
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+        self.url = f"http://127.0.0.1:{self.port}/customsearch/v1"
+
+    def lookup(self, query):
+        links = self.results.get(query.split(" real estate", 1)[0])
+        if links is not None:
+            return links
+        for name, links in self.results.items():
+            if name in query:
+                return links
+        return []
+
+
+class _SiteHandler(_QuietHandler):
+    def do_GET(self):
+        host = self.headers.get("Host", "").split(":")[0].lower()
+        path = urlparse(self.path).path.rstrip("/") or "/"
+        page = self.server_owner.pages.get(host, {}).get(path)
+        if page is None:
+            self._send(404, "not found", "text/html")
+        else:
+            self._send(200, page, "text/html; charset=utf-8")
+
+    do_HEAD = do_GET
+
+
+class FakeSiteServer(_Server):
+    """
+    Serves `pages`, a {host: {path: html}} dict, for every host on one port.
+    Pair with a ZoneFileResolver mapping those hosts to 127.0.0.1.
+    """
+
+    handler = _SiteHandler
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+
+    def site_url(self, host):
+        return f"http://{host}:{self.port}/"
+
+
+class ZoneFileResolver:
+    """
+    DNS backend for dns_cache.set_backend(), answering from a minimal zone
+    file: "$TTL n", "$ORIGIN name." and "name [ttl] [IN] TYPE rdata" lines.
+    Unknown names raise NXDOMAIN, known names without the type NoAnswer.
+    """
+
+    def __init__(self, path=None, text=None):
+        self.records = {}   # name -> {rdtype: [records]}
+        self.ttl = {}       # (name, rdtype) -> ttl
+        if path:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        self._parse(text or "")
+
+    def _parse(self, text):
+        default_ttl, origin = 3600, ""
+        for line in text.splitlines():
+            line = line.split(";", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if parts[0] == "$TTL":
+                default_ttl = int(parts[1])
+                continue
+            if parts[0] == "$ORIGIN":
+                origin = parts[1].rstrip(".")
+                continue
+            name, rest = parts[0], parts[1:]
+            if name == "@":
+                name = origin
+            elif not name.endswith(".") and origin:
+                name = f"{name}.{origin}"
+            ttl = default_ttl
+            if rest and rest[0].isdigit():
+                ttl = int(rest.pop(0))
+            if rest and rest[0].upper() == "IN":
+                rest.pop(0)
+            rdtype, rdata = rest[0].upper(), rest[1:]
+            if rdtype == "MX" and origin and not rdata[1].endswith("."):
+                rdata = [rdata[0], f"{rdata[1]}.{origin}"]
+            self.add(name, rdtype, rdata, ttl)
+
+    def add(self, name, rdtype, rdata, ttl=3600):
+        """
+        Add one record; `rdata` is the list of fields after the type.
+        """
+        name = name.lower().rstrip(".")
+        if rdtype == "MX":
+            record = (int(rdata[0]), rdata[1].rstrip(".") + ".")
+        else:
+            record = " ".join(rdata)
+        self.records.setdefault(name, {}).setdefault(rdtype, []).append(record)
+        self.ttl[(name, rdtype)] = ttl
+
+    def __call__(self, name, rdtype):
+        name = name.lower().rstrip(".")
+        by_type = self.records.get(name)
+        if by_type is None:
+            raise dns.resolver.NXDOMAIN(qnames=[dns.name.from_text(name)])
+        if rdtype not in by_type:
+            raise dns.resolver.NoAnswer()
+        return sorted(by_type[rdtype]), self.ttl[(name, rdtype)]
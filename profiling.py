@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+from contextlib import contextmanager
+
+from scraper_log import get_logger
+
+# --- CONFIGURATION ---
+TRACE_DIR = "traces"     # Where --profile writes trace / profile files
+MAX_ARG_CHARS = 200      # Span args are truncated to this (URLs, queries, names)
+# ------------------------
+
+log = get_logger("profiling")
+
+_enabled = False
+_events = []
+_lock = threading.Lock()
+_t0 = time.perf_counter()
+
+
+def enable():
+    """
+    Start collecting spans. Until this is called span() and @traced are no-ops.
+    """
+    global _enabled, _t0
+    with _lock:
+        _events.clear()
+    _t0 = time.perf_counter()
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def _us(t):
+    return round((t - _t0) * 1_000_000, 1)
+
+
+@contextmanager
+def span(name, **args):
+    """
+    Time the enclosed block as one Chrome-trace "complete" event.
+    Extra keyword args (url, agency, ...) show up in the event details.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        event = {
+            "name": name, "ph": "X", "ts": _us(start), "dur": round((end - start) * 1_000_000, 1),
+            "pid": os.getpid(), "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = {k: str(v)[:MAX_ARG_CHARS] for k, v in args.items()}
+        with _lock:
+            _events.append(event)
+
+
+def traced(name, arg=0):
+    """
+    Decorator form of span(); positional argument number `arg` (the URL or
+    query, never page HTML) is attached to the event. arg=None records none.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            if arg is None:
+                with span(name):
+                    return func(*args, **kwargs)
+            with span(name, arg=args[arg] if len(args) > arg else ""):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_trace(path):
+    """
+    Write the collected spans as Chrome trace JSON (loads in chrome://tracing,
+    Perfetto and speedscope). Returns the path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _lock:
+        events = sorted(_events, key=lambda e: e["ts"])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def run_profiled(func, profiler, out_base):
+    """
+    Run `func()` under cProfile (writes <out_base>.prof and prints the top
+    cumulative entries) or pyinstrument, if installed (writes a speedscope
+    <out_base>.speedscope.json).
+    """
+    os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+        prof = Profiler()
+        prof.start()
+        try:
+            return func()
+        finally:
+            prof.stop()
+            with open(f"{out_base}.speedscope.json", "w", encoding="utf-8") as f:
+                f.write(prof.output(SpeedscopeRenderer()))
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func)
+    finally:
+        prof.dump_stats(f"{out_base}.prof")
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(25)
+
+
+def add_profile_args(parser):
+    """
+    Shared --profile / --profiler / --agencies / --limit flags for entry points.
+    """
+    parser.add_argument("--profile", action="store_true",
+                        help=f"record timing spans and write a Chrome/speedscope trace to {TRACE_DIR}/")
+    parser.add_argument("--profiler", choices=("cprofile", "pyinstrument"),
+                        help="also run the whole pipeline under this profiler")
+    parser.add_argument("--agencies", nargs="+", metavar="NAME",
+                        help="only process these agencies (exact names)")
+    parser.add_argument("--limit", type=int, help="only process the first N agencies")
+
+
+def run_entry_point(main, args, run_name):
+    """
+    Call main(agencies=..., limit=...) honouring the profiling flags.
+    """
+    call = functools.partial(main, agencies=args.agencies, limit=args.limit)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if args.profile:
+        enable()
+    try:
+        if args.profiler:
+            return run_profiled(call, args.profiler, os.path.join(TRACE_DIR, f"{run_name}-{stamp}"))
+        return call()
+    finally:
+        if args.profile:
+            path = write_trace(os.path.join(TRACE_DIR, f"{run_name}-{stamp}.trace.json"))
+            log.info("Trace written to %s", path)
@@ -0,0 +1,178 @@
+import time
+import argparse
+import requests
+from urllib.parse import urlparse
+
+import dns_cache
+import results_store
+from extractor import (
+    USER_AGENT, extract_emails, is_html_response, read_capped,
+    search_agency_site, scrape_agency,
+)
+from profiling import span, add_profile_args, run_entry_point
+from scraper_log import get_logger, setup_logging
+
+# --- CONFIGURATION ---
+OUT_CSV = "out_refresh.csv"     # CSV export of this refresh run
+DAY     = 24 * 3600
+
+# How long each state is trusted before the agency is due again (seconds)
+MAX_AGE = {
+    "ok":          7 * DAY,     # revalidate found emails weekly
+    "fetch-error": 1 * DAY,     # transient more often than not
+    "no-email":    30 * DAY,    # already went through the deep crawl
+    "no-site":     30 * DAY,    # CSE rarely changes its mind quickly
+}
+
+# Lower = handled first within a refresh run
+PRIORITY = {"fetch-error": 0, "ok": 1, "no-email": 2, "no-site": 3}
+# ------------------------
+
+log = get_logger("refresh")
+
+
+def is_due(state, now):
+    """
+    True if the agency's last attempt is older than its state allows.
+    """
+    max_age = MAX_AGE.get(state["status"], 0)
+    last = state["last_success"] if state["status"] == "ok" else state["last_attempt"]
+    return last is None or now - last >= max_age
+
+
+def plan_refresh(states, now=None):
+    """
+    Due agencies, most urgent first: by status priority, then oldest success
+    (or attempt) first.
+    """
+    now = now or time.time()
+    due = [s for s in states if is_due(s, now)]
+    return sorted(due, key=lambda s: (
+        PRIORITY.get(s["status"], len(PRIORITY)),
+        s["last_success"] or s["last_attempt"] or 0,
+    ))
+
+
+def fetch_conditional(url, etag="", last_modified=""):
+    """
+    Conditional GET of a previously productive page.
+    Returns (status_code, html, etag, last_modified); html is "" on a 304
+    or failure (status_code 0).
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        with requests.get(url, headers=headers, timeout=10, stream=True) as r:
+            new_etag = r.headers.get("ETag", etag)
+            new_modified = r.headers.get("Last-Modified", last_modified)
+            if r.status_code == 304:
+                return 304, "", new_etag, new_modified
+            r.raise_for_status()
+            html = read_capped(r) if is_html_response(r.headers) else ""
+            return r.status_code, html, new_etag, new_modified
+    except Exception as e:
+        log.debug("Conditional GET failed for %s: %s", url, e)
+        return 0, "", etag, last_modified
+
+
+def revalidate(store, state):
+    """
+    Cheap check that an agency's emails are still on the page they came
+    from. Returns True if they are (nothing else to do), False if a full
+    scrape is needed.
+    """
+    if not state["page_url"]:
+        return False
+    previous = set(results_store.latest_emails(store, state["agency"]))
+    code, html, etag, modified = fetch_conditional(
+        state["page_url"], state["etag"], state["last_modified"]
+    )
+    if code == 304:
+        log.debug("304 Not Modified for %s", state["page_url"])
+        results_store.touch_agency(store, state["agency"], etag, modified)
+        return True
+    if html and previous & set(extract_emails(html, state["site"], state["agency"])):
+        log.debug("Emails still present on %s", state["page_url"])
+        results_store.touch_agency(store, state["agency"], etag, modified)
+        return True
+    return False
+
+
+def refresh_agency(store, run_id, state):
+    """
+    Revalidate or re-scrape one due agency, escalating only as far as needed:
+    conditional GET -> steps A–F on the known site -> CSE + steps A–F.
+    """
+    name = state["agency"]
+    if state["status"] == "ok":
+        with span("revalidate", agency=name):
+            if revalidate(store, state):
+                return "revalidated"
+
+    site = state["site"]
+    if not site or state["status"] == "no-site":
+        site = search_agency_site(name)
+        if not site:
+            results_store.record_agency(store, run_id, name, "", [], "none", status="no-site")
+            return "no-site"
+
+    emails, method, page_url, timings, status = scrape_agency(name, site)
+    results_store.record_agency(
+        store, run_id, name, site, emails, method,
+        page_url=page_url, timings=timings, status=status
+    )
+    return status
+
+
+def main(agencies=None, limit=None, dry_run=False):
+    """
+    Refresh every due agency in the results store, or only `agencies` /
+    the first `limit` due ones.
+    """
+    store = results_store.open_store()
+    results_store.backfill_agencies(store)
+
+    plan = plan_refresh(results_store.agency_states(store))
+    if agencies:
+        plan = [s for s in plan if s["agency"] in set(agencies)]
+    if limit:
+        plan = plan[:limit]
+    counts = {}
+    for state in plan:
+        counts[state["status"]] = counts.get(state["status"], 0) + 1
+    log.info("%s agencies due for refresh: %s", len(plan), counts)
+    if dry_run:
+        for state in plan:
+            log.info("%s (%s, stage=%s)", state["agency"], state["status"], state["stage"])
+        store.close()
+        return
+
+    dns_cache.install()
+    known_host = lambda s: urlparse(s["page_url"] or s["site"]).hostname if s["page_url"] or s["site"] else None
+    run_id = results_store.new_run_id("refresh")
+    try:
+        for idx, state in enumerate(dns_cache.prefetch_ahead(plan, known_host), 1):
+            log.info("(%s/%s) Refreshing: %s [%s]", idx, len(plan), state["agency"], state["status"])
+            with span("agency", agency=state["agency"]):
+                outcome = refresh_agency(store, run_id, state)
+            log.info("→ %s", outcome)
+            if outcome != "revalidated":
+                time.sleep(1)  # polite pause after a real scrape
+    finally:
+        results_store.export_csv(store, OUT_CSV, run_id=run_id)
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-scrape only stale or failed agencies.")
+    add_profile_args(parser)
+    parser.add_argument("--dry-run", action="store_true", help="only list the agencies that are due")
+    args = parser.parse_args()
+    setup_logging()
+    if args.dry_run:
+        main(agencies=args.agencies, limit=args.limit, dry_run=True)
+    else:
+        run_entry_point(main, args, "refresh")
@@ -0,0 +1,240 @@
+import csv
+import json
+import time
+import sqlite3
+
+# --- CONFIGURATION ---
+STORE_DB = "results.sqlite"     # Single results store shared by all scrapers
+# ------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id          INTEGER PRIMARY KEY,
+    run_id      TEXT NOT NULL,
+    agency      TEXT NOT NULL,
+    site        TEXT NOT NULL DEFAULT '',
+    email       TEXT NOT NULL DEFAULT '',
+    domain      TEXT NOT NULL DEFAULT '',
+    method      TEXT NOT NULL DEFAULT '',
+    page_url    TEXT NOT NULL DEFAULT '',
+    timings     TEXT NOT NULL DEFAULT '{}',
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_agency ON results(agency, email);
+CREATE INDEX IF NOT EXISTS idx_results_domain ON results(domain);
+CREATE INDEX IF NOT EXISTS idx_results_run    ON results(run_id);
+
+-- Latest state per agency, used by refresh.py to schedule re-scrapes.
+-- status: ok | no-site | fetch-error | no-email; stage: last step reached
+CREATE TABLE IF NOT EXISTS agencies (
+    agency        TEXT PRIMARY KEY,
+    site          TEXT NOT NULL DEFAULT '',
+    status        TEXT NOT NULL,
+    stage         TEXT NOT NULL DEFAULT '',
+    page_url      TEXT NOT NULL DEFAULT '',
+    etag          TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    last_attempt  REAL NOT NULL,
+    last_success  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_agencies_status ON agencies(status, last_attempt);
+
+-- CSV-shaped view; export_csv() writes this as agency,email,method
+CREATE VIEW IF NOT EXISTS agency_emails AS
+    SELECT run_id, agency, email, method FROM results ORDER BY id;
+
+-- Agencies for which no run has ever found an email
+CREATE VIEW IF NOT EXISTS missing_agencies AS
+    SELECT agency FROM results GROUP BY agency HAVING MAX(email != '') = 0;
+"""
+
+
+def open_store(path=STORE_DB):
+    """
+    Open (and create if needed) the SQLite results store.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def new_run_id(prefix="run"):
+    """
+    Identifier grouping the rows written by one scraper run.
+    """
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def record_agency(conn, run_id, agency, site, emails, method,
+                  page_url="", timings=None, status=None, stage=None):
+    """
+    Store the outcome for one agency: one row per email, or a single row
+    with an empty email when nothing was found, and update its entry in the
+    agencies table. `status` defaults to ok / no-site / no-email and `stage`
+    to the last step in `timings`. Commits immediately so an interrupted run
+    keeps everything scraped so far.
+    """
+    now = time.time()
+    if status is None:
+        status = "ok" if emails else ("no-email" if site else "no-site")
+    if stage is None:
+        stage = list(timings)[-1] if timings else method
+    timings_json = json.dumps(timings or {})
+    rows = [
+        (run_id, agency, site or "", e, e.rsplit("@", 1)[-1].lower() if e else "",
+         method, page_url or "", timings_json, now)
+        for e in (emails or [""])
+    ]
+    conn.executemany(
+        "INSERT INTO results (run_id, agency, site, email, domain, method,"
+        " page_url, timings, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.execute(
+        "INSERT INTO agencies (agency, site, status, stage, page_url, last_attempt, last_success)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT(agency) DO UPDATE SET"
+        "  site = CASE WHEN excluded.site != '' THEN excluded.site ELSE site END,"
+        "  status = excluded.status, stage = excluded.stage,"
+        "  page_url = CASE WHEN excluded.status = 'ok' THEN excluded.page_url ELSE page_url END,"
+        "  etag = CASE WHEN excluded.status = 'ok' AND excluded.page_url != page_url THEN '' ELSE etag END,"
+        "  last_modified = CASE WHEN excluded.status = 'ok' AND excluded.page_url != page_url"
+        "                  THEN '' ELSE last_modified END,"
+        "  last_attempt = excluded.last_attempt,"
+        "  last_success = COALESCE(excluded.last_success, last_success)",
+        (agency, site or "", status, stage, page_url or "", now, now if emails else None)
+    )
+    conn.commit()
+
+
+def touch_agency(conn, agency, etag="", last_modified=""):
+    """
+    Mark a previously found result as still valid (e.g. after a 304) and
+    remember the validators for the next conditional GET.
+    """
+    now = time.time()
+    conn.execute(
+        "UPDATE agencies SET status = 'ok', last_attempt = ?, last_success = ?,"
+        " etag = ?, last_modified = ? WHERE agency = ?",
+        (now, now, etag, last_modified, agency)
+    )
+    conn.commit()
+
+
+def latest_emails(conn, agency):
+    """
+    Emails from the most recent run that found any for `agency`.
+    """
+    return [
+        row[0] for row in conn.execute(
+            "SELECT email FROM results WHERE agency = ? AND run_id = ("
+            " SELECT run_id FROM results WHERE agency = ? AND email != ''"
+            " ORDER BY id DESC LIMIT 1) AND email != '' ORDER BY id",
+            (agency, agency)
+        )
+    ]
+
+
+def agency_states(conn):
+    """
+    All rows of the agencies table as dicts.
+    """
+    cur = conn.execute("SELECT * FROM agencies")
+    names = [c[0] for c in cur.description]
+    return [dict(zip(names, row)) for row in cur]
+
+
+def backfill_agencies(conn):
+    """
+    Derive agencies rows from results for stores filled before the agencies
+    table existed (or by import_csv). Existing rows are left alone.
+    """
+    conn.execute(
+        "INSERT OR IGNORE INTO agencies (agency, site, status, stage, page_url,"
+        " last_attempt, last_success)"
+        " SELECT agency, MAX(site),"
+        "  CASE WHEN MAX(email != '') THEN 'ok' WHEN MAX(site) != '' THEN 'no-email'"
+        "       ELSE 'no-site' END,"
+        "  '', MAX(CASE WHEN email != '' THEN page_url ELSE '' END), MAX(recorded_at),"
+        "  MAX(CASE WHEN email != '' THEN recorded_at END)"
+        " FROM results GROUP BY agency"
+    )
+    conn.commit()
+
+
+def latest_run_id(conn, prefix):
+    """
+    Most recent run_id starting with `prefix` (e.g. "kyero"), or None.
+    """
+    row = conn.execute(
+        "SELECT run_id FROM results WHERE run_id LIKE ? ORDER BY id DESC LIMIT 1",
+        (f"{prefix}-%",)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def missing_agencies(conn, run_id=None):
+    """
+    Agencies with no email in any run, in first-seen order; only those
+    scraped in `run_id` if given.
+    """
+    query = "SELECT agency FROM results WHERE agency IN (SELECT agency FROM missing_agencies)"
+    params = ()
+    if run_id:
+        query += " AND agency IN (SELECT agency FROM results WHERE run_id = ?)"
+        params = (run_id,)
+    return [row[0] for row in conn.execute(query + " GROUP BY agency ORDER BY MIN(id)", params)]
+
+
+def emails_by_domain(conn, domain):
+    """
+    Distinct (agency, email) pairs whose email is at `domain`.
+    """
+    return conn.execute(
+        "SELECT DISTINCT agency, email FROM results WHERE domain = ? ORDER BY agency, email",
+        (domain.lower(),)
+    ).fetchall()
+
+
+def import_csv(conn, path, run_id=None, default_method=""):
+    """
+    Load a legacy agency,email[,method] CSV (out.csv, out_combined.csv, ...)
+    into the store. Returns the number of rows imported.
+    """
+    run_id = run_id or f"import:{path}"
+    now = time.time()
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            agency = (row.get("agency") or "").strip()
+            if not agency:
+                continue
+            email = (row.get("email") or "").strip()
+            rows.append((
+                run_id, agency, email, email.rsplit("@", 1)[-1].lower() if email else "",
+                row.get("method") or default_method, now
+            ))
+    conn.executemany(
+        "INSERT INTO results (run_id, agency, email, domain, method, recorded_at)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    return len(rows)
+
+
+def export_csv(conn, path, run_id=None):
+    """
+    Write the agency_emails view (optionally one run only) as a CSV with the
+    same agency,email,method columns the scrapers always produced.
+    """
+    query = "SELECT agency, email, method FROM agency_emails"
+    params = ()
+    if run_id:
+        query += " WHERE run_id = ?"
+        params = (run_id,)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["agency", "email", "method"])
+        writer.writerows(conn.execute(query, params))
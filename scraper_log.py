@@ -0,0 +1,103 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import itertools
+import logging.handlers
+
+# --- CONFIGURATION ---
+LOG_LEVEL   = os.environ.get("SCRAPER_LOG_LEVEL", "INFO")             # Console + file level
+LOG_JSON    = os.environ.get("SCRAPER_LOG_JSON", "scraper.log.jsonl")  # "" disables the file
+PAGE_SAMPLE = int(os.environ.get("SCRAPER_LOG_SAMPLE", "10"))          # Keep 1 in N per-page records
+# ------------------------
+
+ROOT = "scraper"
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message (+ exception).
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let through one in `rate` records; warnings and errors always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or next(self._counter) % self.rate == 0
+
+
+def get_logger(name):
+    """
+    Logger under the shared "scraper" hierarchy. Use get_logger("page") for
+    per-page/per-email chatter, which is sampled.
+    """
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def _shutdown():
+    # Stop the current listener (flushing queued records) and close its file
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_shutdown)
+
+
+def setup_logging(level=LOG_LEVEL, json_path=LOG_JSON, page_sample=PAGE_SAMPLE):
+    """
+    Console handler plus (optionally) a JSON-lines file written from a
+    background thread via a queue, so hot loops never block on disk I/O.
+    Safe to call more than once; later calls replace earlier handlers.
+    """
+    global _listener
+    root = logging.getLogger(ROOT)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    _shutdown()
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    root.addHandler(console)
+
+    if json_path:
+        file_handler = logging.FileHandler(json_path, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, file_handler)
+        _listener.start()
+
+    page = get_logger("page")
+    for f in list(page.filters):
+        page.removeFilter(f)
+    if page_sample > 1:
+        page.addFilter(SampleFilter(page_sample))
@@ -0,0 +1,70 @@
+import os
+import random
+import logging
+
+import pytest
+
+import bench
+import extractor
+from scraper_log import setup_logging
+
+try:
+    import pytest_benchmark
+except ImportError:
+    pytest_benchmark = None
+
+# Throughput regression gate for `pytest`, on the same offline fakes as
+# bench.py:
+#   test_no_throughput_regression  - fails when any rate drops more than
+#                                    bench.TOLERANCE below bench_baseline.json
+#   test_*_benchmark               - pytest-benchmark timings of the hot
+#                                    functions; compare runs with
+#                                    --benchmark-autosave --benchmark-compare
+#                                    --benchmark-compare-fail=mean:30%
+# BENCH_ROWS overrides the row count; a baseline must exist for it
+# (python bench.py --rows N --update-baseline).
+
+ROWS = int(os.environ.get("BENCH_ROWS", bench.TEST_ROWS))
+CORPUS_PAGES = 200
+
+needs_benchmark = pytest.mark.skipif(pytest_benchmark is None, reason="pytest-benchmark not installed")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def quiet_logging():
+    setup_logging(level=logging.WARNING, json_path="")
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(bench.SEED)
+    hosts = [bench.agency_host(i) for i in range(CORPUS_PAGES)]
+    pages = [bench.synthetic_page(rng, i) for i in range(CORPUS_PAGES)]
+    return list(zip(pages, hosts))
+
+
+def test_no_throughput_regression():
+    baseline = bench.load_baseline(ROWS)
+    if not baseline:
+        message = f"no {bench.BASELINE_FILE} entry for {ROWS} rows"
+        if os.environ.get("CI"):
+            pytest.fail(message)
+        pytest.skip(message)
+    rates = bench.run_benchmarks(ROWS)
+    assert bench.find_regressions(rates, baseline) == []
+
+
+@needs_benchmark
+def test_extract_emails_benchmark(benchmark, corpus):
+    def run():
+        for html, host in corpus:
+            extractor.extract_emails(html, f"http://{host}/", host.split(".")[0])
+    benchmark(run)
+
+
+@needs_benchmark
+def test_get_internal_links_benchmark(benchmark, corpus):
+    def run():
+        for html, host in corpus:
+            extractor.get_internal_links(html, f"http://{host}/")
+    benchmark.pedantic(run, rounds=3)
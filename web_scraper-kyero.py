@@ -1,13 +1,19 @@
+import os
 import json
 import re
 import csv
 import time
 import requests
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+
+import dns_cache
+import results_store
+from scraper_log import get_logger, setup_logging
 
 # --- CONFIGURE THESE ---
 API_KEY = "GOOGLE_API_KEY"
 CX      = "GOOGLE_CX"
+CSE_URL = os.environ.get("CSE_URL", "https://www.googleapis.com/customsearch/v1")  # fakes.FakeCSEServer offline
 JSON_IN = "agencies.json"
 CSV_OUT = "out.csv"
 # ------------------------
@@ -15,31 +21,35 @@ CSV_OUT = "out.csv"
 EMAIL_REGEX    = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 HREF_CONTA_RX  = re.compile(r'href=[\'"]([^\'"]*contac[^\'"]*)[\'"]', re.IGNORECASE)
 
+log = get_logger("kyero")
+page_log = get_logger("page")
+
+
 def google_search_site(query):
-    print(f"[DEBUG] Google searching for: {query}")
+    log.debug("Google searching for: %s", query)
     params = {'key': API_KEY, 'cx': CX, 'q': query}
     try:
-        resp = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=10)
+        resp = requests.get(CSE_URL, params=params, timeout=10)
         resp.raise_for_status()
         items = resp.json().get("items", [])
         if items:
             link = items[0]['link']
-            print(f"[DEBUG] → Google returned: {link}")
+            log.debug("→ Google returned: %s", link)
             return link
         else:
-            print("[DEBUG] → Google returned no items")
+            log.debug("→ Google returned no items")
     except Exception as e:
-        print(f"[DEBUG] → Google search failed: {e}")
+        log.debug("→ Google search failed: %s", e)
     return None
 
 def fetch_html(url):
-    print(f"[DEBUG] Fetching: {url}")
+    log.debug("Fetching: %s", url)
     try:
         r = requests.get(url, timeout=10)
         r.raise_for_status()
         html = r.text
     except Exception as e:
-        print(f"[DEBUG] → fetch/error: {e}")
+        log.debug("→ fetch/error: %s", e)
         html = ""
     time.sleep(1)  # ← polite delay
     return html
@@ -47,9 +57,9 @@ def fetch_html(url):
 def extract_emails_from_text(text):
     found = sorted(set(EMAIL_REGEX.findall(text)))
     if found:
-        print(f"[DEBUG] → emails found: {found}")
+        page_log.debug("→ emails found: %s", found)
     else:
-        print("    → no emails found")
+        page_log.debug("→ no emails found")
     return found
 
 def find_conta_link(html, base_url):
@@ -57,52 +67,69 @@ def find_conta_link(html, base_url):
     if matches:
         href = matches[0]
         full = urljoin(base_url, href)
-        print(f"[DEBUG] → found conta‐link in HTML: {full}")
+        log.debug("→ found conta‐link in HTML: %s", full)
         return full
-    print("    → no conta‐link found in HTML")
+    log.debug("→ no conta‐link found in HTML")
     return None
 
 def lookup_site(agency):
     if agency.get("website"):
-        print(f"[DEBUG] Using JSON website for {agency['name']}: {agency['website']}")
+        log.debug("Using JSON website for %s: %s", agency['name'], agency['website'])
         return agency["website"]
     # only fallback: google
     return google_search_site(f"{agency['name']} real estate orihuela")
 
 def main():
     agencies = json.load(open(JSON_IN, encoding="utf-8"))
-    with open(CSV_OUT, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["agency", "email"])
-
-        for agency in agencies:
-            name = agency["name"]
-            print(f"\n[INFO] Processing: {name}")
-            site = lookup_site(agency)
-            emails = []
-
-            if site:
-                # 1) fetch main page
-                html = fetch_html(site)
-                emails = extract_emails_from_text(html)
-
-                # 2) if none, look for any contac* link in the HTML
-                if not emails:
-                    conta_url = find_conta_link(html, site)
-                    if conta_url:
-                        html2 = fetch_html(conta_url)
-                        emails = extract_emails_from_text(html2)
-
-            # 3) write to CSV
-            if emails:
-                for e in emails:
-                    writer.writerow([name, e])
-                print(f"[INFO] → saved {len(emails)} emails for {name}")
-            else:
-                writer.writerow([name, ""])
-                print(f"[WARN]  → no email found for {name}")
-
-            csvfile.flush()
+    dns_cache.install()
+    # Websites are known up front; warm DNS a batch ahead of the loop
+    website_host = lambda a: urlparse(a["website"]).hostname if a.get("website") else None
+    store = results_store.open_store()
+    run_id = results_store.new_run_id("kyero")
+    try:
+        with open(CSV_OUT, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["agency", "email"])
+
+            for agency in dns_cache.prefetch_ahead(agencies, website_host):
+                name = agency["name"]
+                log.info("Processing: %s", name)
+                site = lookup_site(agency)
+                emails = []
+                method, page_url = "none", ""
+
+                if site:
+                    # 1) fetch main page
+                    html = fetch_html(site)
+                    emails = extract_emails_from_text(html)
+                    if emails:
+                        method, page_url = "plain", site
+
+                    # 2) if none, look for any contac* link in the HTML
+                    if not emails:
+                        conta_url = find_conta_link(html, site)
+                        if conta_url:
+                            html2 = fetch_html(conta_url)
+                            emails = extract_emails_from_text(html2)
+                            if emails:
+                                method, page_url = "plain-contact", conta_url
+
+                # 3) write to CSV
+                if emails:
+                    for e in emails:
+                        writer.writerow([name, e])
+                    log.info("→ saved %s emails for %s", len(emails), name)
+                else:
+                    writer.writerow([name, ""])
+                    log.warning("→ no email found for %s", name)
+
+                csvfile.flush()
+                # ...and to the results store, which extractor_with_cse_v2 reads
+                results_store.record_agency(store, run_id, name, site or "", emails, method, page_url=page_url)
+    finally:
+        store.close()
+
 
 if __name__ == "__main__":
+    setup_logging()
     main()